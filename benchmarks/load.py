@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Puts load on a site with virtual users that repeat the HomePage flow over HTTP.
+
+    python -m benchmarks.load --users 50 --ramp 10 --duration 30
+
+Each virtual user loads the page, fetches its stylesheets, scripts and images, and submits the form
+of HomePage._input_field_locator, over a keep-alive connection pool of its own. Without --base-url
+the sample page is served locally, so no outside services are used. Throughput and a latency
+histogram are reported for each step.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+try:
+    from urlparse import urljoin
+except ImportError:
+    from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from pages import instrumentation
+from pages.home import HomePage
+from benchmarks.site import SampleSite
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def _find(soup, locator):
+    """Return the first tag at a page object locator in the parsed page, or None."""
+    by, value = locator
+    if by == 'id':
+        return soup.find(id=value)
+    if by == 'css selector':
+        matches = soup.select(value)
+        return matches and matches[0] or None
+    if by == 'name':
+        return soup.find(attrs={'name': value})
+    raise ValueError('Locators by %s cannot be used for load steps.' % by)
+
+
+def page_flow(base_url, page_class=HomePage, text='Just some text.'):
+    """
+    Return the steps of a virtual user for the page object: (name, method, url, data) tuples that load
+    the page, fetch its assets and submit the form of its input field, read from the page itself.
+    """
+    url = base_url + page_class._page_url_suffix
+    soup = BeautifulSoup(requests.get(url).content, 'html.parser')
+    steps = [('page load', 'get', url, None)]
+    assets = [(tag, 'href') for tag in soup.find_all('link', href=True) if 'stylesheet' in (tag.get('rel') or [])]
+    assets += [(tag, 'src') for tag in soup.find_all(['script', 'img'], src=True)]
+    for tag, attribute in assets:
+        steps.append(('asset %s' % tag[attribute], 'get', urljoin(url, tag[attribute]), None))
+    field = _find(soup, page_class._input_field_locator)
+    form = field is not None and field.find_parent('form') or None
+    if form is not None:
+        data = {}
+        for tag in form.find_all(['input', 'select', 'textarea']):
+            if tag.get('name') and tag.get('type') not in ('submit', 'button', 'image'):
+                data[tag['name']] = tag.get('value', '')
+        data[field['name']] = text
+        button = _find(soup, page_class._submit_button_locator)
+        if button is not None and button.get('name'):
+            data[button['name']] = button.get('value', '')
+        steps.append(('form submit', (form.get('method') or 'get').lower(), urljoin(url, form.get('action') or ''), data))
+    return steps
+
+
+class VirtualUser(threading.Thread):
+    """Repeats the steps over a connection pool of its own until it is stopped, recording each request."""
+
+    def __init__(self, steps, stop, think_time=0, timeout=30):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.steps = steps
+        self.stop = stop
+        self.think_time = think_time
+        self.timeout = timeout
+        # (step, seconds, ok) for every request
+        self.records = []
+
+    def run(self):
+        session = requests.Session()
+        try:
+            while not self.stop.is_set():
+                for name, method, url, data in self.steps:
+                    if self.stop.is_set():
+                        break
+                    start = time.time()
+                    try:
+                        if method == 'post':
+                            response = session.post(url, data=data, timeout=self.timeout)
+                        else:
+                            response = session.get(url, params=data, timeout=self.timeout)
+                        # read the whole body, as a browser would
+                        response.content
+                        ok = response.status_code < 400
+                    except requests.RequestException:
+                        ok = False
+                    self.records.append((name, time.time() - start, ok))
+                if self.think_time:
+                    self.stop.wait(self.think_time)
+        finally:
+            session.close()
+
+
+def histogram(latencies):
+    """Return the number of latencies in each of BUCKETS_MS, and above the last one."""
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for latency in latencies:
+        milliseconds = latency * 1000
+        index = 0
+        while index < len(BUCKETS_MS) and milliseconds > BUCKETS_MS[index]:
+            index += 1
+        counts[index] += 1
+    return counts
+
+
+def run(steps, users, ramp, duration, think_time=0):
+    """
+    Start the virtual users evenly over ramp seconds, keep them running until duration seconds have
+    passed from the start, and return {step: {'requests', 'errors', 'rps', latency stats, 'histogram'}}.
+    """
+    stop = threading.Event()
+    virtual_users = []
+    start = time.time()
+    try:
+        for index in range(users):
+            delay = start + ramp * index / float(max(users, 1)) - time.time()
+            if delay > 0 and stop.wait(delay):
+                break
+            user = VirtualUser(steps, stop, think_time)
+            user.start()
+            virtual_users.append(user)
+        remaining = start + duration - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+    finally:
+        stop.set()
+        for user in virtual_users:
+            user.join()
+    elapsed = time.time() - start
+    latencies, errors = {}, {}
+    for user in virtual_users:
+        for name, latency, ok in user.records:
+            latencies.setdefault(name, []).append(latency)
+            errors[name] = errors.get(name, 0) + (not ok and 1 or 0)
+    results = {}
+    for name, values in latencies.items():
+        summary = instrumentation.summarize(values)
+        summary.update({
+            'requests': len(values),
+            'errors': errors[name],
+            'rps': round(len(values) / elapsed, 2),
+            'p99_ms': round(instrumentation.percentile(values, 0.99) * 1000, 3),
+            'histogram': histogram(values),
+        })
+        results[name] = summary
+    return results
+
+
+def report_lines(steps, results):
+    lines = ['%-30s %9s %7s %9s %9s %9s %9s %9s' % (
+        'step', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms')]
+    for name, method, url, data in steps:
+        result = results.get(name)
+        if result is None:
+            continue
+        lines.append('%-30s %9d %7d %9.1f %9.1f %9.1f %9.1f %9.1f' % (
+            name[:30], result['requests'], result['errors'], result['rps'],
+            result['p50_ms'], result['p95_ms'], result['p99_ms'], result['max_ms']))
+    lines.append('')
+    lines.append('%-30s %s' % ('latency histogram (ms)', ' '.join(
+        '%6s' % ('<=%s' % bound) for bound in BUCKETS_MS) + '  >%s' % BUCKETS_MS[-1]))
+    for name, method, url, data in steps:
+        if name in results:
+            lines.append('%-30s %s' % (name[:30], ' '.join('%6d' % count for count in results[name]['histogram'])))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--base-url',
+                        help='site to load; by default the sample page is served locally')
+    parser.add_argument('--users', type=int, default=10,
+                        help='number of concurrent virtual users (default: %(default)s)')
+    parser.add_argument('--ramp', type=float, default=5,
+                        help='seconds over which the virtual users are started (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=20,
+                        help='seconds to run for, including the ramp (default: %(default)s)')
+    parser.add_argument('--think-time', type=float, default=0,
+                        help='seconds each virtual user waits between flows (default: %(default)s)')
+    parser.add_argument('--output',
+                        help='file to write the results to as json')
+    args = parser.parse_args(argv)
+
+    site = None
+    base_url = args.base_url
+    if base_url is None:
+        site = SampleSite(['sample']).start()
+        base_url = site.url('sample')
+    try:
+        steps = page_flow(base_url)
+        results = run(steps, args.users, args.ramp, args.duration, args.think_time)
+    finally:
+        if site is not None:
+            site.stop()
+    for line in report_lines(steps, results):
+        print(line)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return sum(result['errors'] for result in results.values()) and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
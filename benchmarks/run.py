@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Benchmarks the HomePage operations against the sample page and scaled variants of it, served locally.
+
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run
+
+The second run fails when an operation got slower than --max-slowdown allows, or sends more
+WebDriver commands, than in the saved baseline.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+
+from pages import instrumentation
+from pages.home import HomePage
+from tests.base_test import BaseTest
+from benchmarks.site import SampleSite, VARIANTS
+from benchmarks.standin import StandInDriver
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+class BenchmarkSetup(object):
+    """Stands in for the mozwebqa funcarg that page objects are created with."""
+
+    default_implicit_wait = 10
+
+    def __init__(self, selenium, base_url, timeout=60):
+        self.selenium = selenium
+        self.base_url = base_url
+        self.timeout = timeout
+
+
+def _link_locators(sizes):
+    return [(By.ID, 'valid-link-%s' % index) for index in range(1, sizes['links'] + 1)]
+
+
+def _check_links(page, sizes):
+    """Check every link on the page, the way test_that_all_links_are_valid does."""
+    html = BeautifulSoup(requests.get(page.base_url).content, 'html.parser')
+    base_test = BaseTest()
+    urls = [base_test.make_absolute(link['href'], page.base_url) for link in html.find_all('a')]
+    return base_test.find_bad_links(urls, page.timeout)
+
+
+# Each operation is called with a freshly opened HomePage and the sizes of the variant it shows
+OPERATIONS = [
+    ('open', lambda page, sizes: page.open(page._page_url_suffix, reload=True)),
+    ('text visible', lambda page, sizes: page.is_text_visible('Casszilla!', page._page_header)),
+    ('wait for visible', lambda page, sizes: page.wait_for_element_visible(page._page_header)),
+    ('hover', lambda page, sizes: page.hover_element(page._hover_image_locator)),
+    ('click', lambda page, sizes: page.click_element(page._click_link_locator)),
+    ('input', lambda page, sizes: page.input_text('Just some text.', page._input_field_locator)),
+    ('select', lambda page, sizes: page.select_option('dropdown option %s' % (sizes['options'] - 1),
+                                                      page._drop_down_locator)),
+    ('dropdown options', lambda page, sizes: page.dropdown_options(page._drop_down_locator)),
+    ('list items count', lambda page, sizes: page.list_items_count),
+    ('list item titles', lambda page, sizes: [item.title for item in page.list_items]),
+    ('list item snapshots', lambda page, sizes: page.list_item_snapshots),
+    ('link destinations', lambda page, sizes: page.link_destinations(_link_locators(sizes))),
+    ('link check', _check_links),
+]
+
+
+def start_driver(name):
+    """Return a new driver for the name, or None when that browser is not available here."""
+    if name == 'standin':
+        return StandInDriver()
+    from selenium import webdriver
+    try:
+        if name == 'firefox':
+            options = webdriver.FirefoxOptions()
+            options.add_argument('-headless')
+            return webdriver.Firefox(options=options)
+        if name == 'chrome':
+            options = webdriver.ChromeOptions()
+            options.add_argument('--headless')
+            return webdriver.Chrome(options=options)
+    except Exception as e:
+        sys.stderr.write('Skipping %s, which could not be started: %s\n' % (name, str(e).strip()))
+        return None
+    raise ValueError('Unknown driver: %s' % name)
+
+
+def run(driver_names, variants, operations, repeat):
+    """Return {driver: {variant: {operation: {'wall_ms': median, 'commands': per run}}}}."""
+    site = SampleSite(variants).start()
+    profiler = instrumentation.profiler = instrumentation.CommandProfiler()
+    results = {}
+    try:
+        for driver_name in driver_names:
+            selenium = start_driver(driver_name)
+            if selenium is None:
+                continue
+            try:
+                for variant in variants:
+                    setup = BenchmarkSetup(selenium, site.url(variant))
+                    for name, operation in OPERATIONS:
+                        if name not in operations:
+                            continue
+                        timings = []
+                        commands = 0
+                        for run_number in range(repeat):
+                            page = HomePage(setup)
+                            page.open(page._page_url_suffix, reload=True)
+                            recorded = len(profiler.records)
+                            start = time.time()
+                            operation(page, VARIANTS[variant])
+                            timings.append(time.time() - start)
+                            commands = len(profiler.records) - recorded
+                        results.setdefault(driver_name, {}).setdefault(variant, {})[name] = {
+                            'wall_ms': round(instrumentation.percentile(timings, 0.5) * 1000, 3),
+                            'commands': commands,
+                        }
+            finally:
+                selenium.quit()
+    finally:
+        instrumentation.profiler = None
+        site.stop()
+    return results
+
+
+def regressions(results, baseline, max_slowdown, min_slowdown_ms):
+    """Return a line for each operation that is slower, or sends more commands, than its baseline."""
+    lines = []
+    for driver, variants in sorted(results.items()):
+        for variant, operations in sorted(variants.items()):
+            for name, result in sorted(operations.items()):
+                before = baseline.get(driver, {}).get(variant, {}).get(name)
+                if before is None:
+                    continue
+                slowdown = result['wall_ms'] - before['wall_ms']
+                if slowdown > min_slowdown_ms and slowdown > before['wall_ms'] * max_slowdown:
+                    lines.append('%s %s %s: %.1f ms, baseline %.1f ms' % (
+                        driver, variant, name, result['wall_ms'], before['wall_ms']))
+                if result['commands'] > before['commands']:
+                    lines.append('%s %s %s: %s WebDriver commands, baseline %s' % (
+                        driver, variant, name, result['commands'], before['commands']))
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--driver', default='standin,firefox,chrome',
+                        help='comma separated drivers to run: standin, firefox and/or chrome (default: %(default)s)')
+    parser.add_argument('--variant', default=','.join(sorted(VARIANTS)),
+                        help='comma separated variants of the sample page (default: %(default)s)')
+    parser.add_argument('--operation', default=','.join(name for name, operation in OPERATIONS),
+                        help='comma separated operations to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of each operation; the median is reported (default: %(default)s)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='baseline file (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save these results as the baseline instead of comparing against it')
+    parser.add_argument('--max-slowdown', type=float, default=0.25,
+                        help='fraction an operation may get slower than its baseline (default: %(default)s)')
+    parser.add_argument('--min-slowdown-ms', type=float, default=5,
+                        help='slowdowns below this many milliseconds are ignored as noise (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    results = run(args.driver.split(','), args.variant.split(','), args.operation.split(','), args.repeat)
+    print('%-10s %-12s %-22s %12s %10s' % ('driver', 'variant', 'operation', 'wall ms', 'commands'))
+    for driver, variants in sorted(results.items()):
+        for variant, operations in sorted(variants.items()):
+            for name, result in sorted(operations.items()):
+                print('%-10s %-12s %-22s %12.1f %10d' % (driver, variant, name, result['wall_ms'], result['commands']))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('Baseline saved to %s' % args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print('No baseline at %s; run with --save-baseline first.' % args.baseline)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    lines = regressions(results, baseline, args.max_slowdown, args.min_slowdown_ms)
+    for line in lines:
+        print('REGRESSION %s' % line)
+    return lines and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
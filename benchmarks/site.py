@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import copy
+import os
+import shutil
+import tempfile
+import threading
+try:
+    from BaseHTTPServer import HTTPServer
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+from bs4 import BeautifulSoup
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample')
+ASSETS = ('core.js', 'style.css', 'hoverboard.gif')
+
+
+def _scale(soup, parent_selector, count):
+    """Repeat the children of the element at parent_selector until there are count of them."""
+    parent = soup.select(parent_selector)[0]
+    children = parent.find_all('li', recursive=False) or parent.find_all('option', recursive=False)
+    for index in range(len(children), count):
+        child = copy.copy(children[index % len(children)])
+        if child.name == 'option':
+            # options need their own values, so that the last one can be selected
+            child['value'] = 'dropdown option %s' % index
+            child.string = 'dropdown option %s' % index
+        parent.append(child)
+
+
+def _number_links(soup):
+    """Give every valid link an id of its own, so that thousands of them can be looked up directly."""
+    for index, link in enumerate(soup.select('#valid-links a')):
+        link['id'] = 'valid-link-%s' % (index + 1)
+
+
+def _offline(soup):
+    """Point the links that leave the site at /links/, which the server answers locally."""
+    for index, link in enumerate(soup.find_all('a', href=True)):
+        if link['href'].startswith('http'):
+            link['href'] = '/links/%s/' % index
+
+
+# The number of list items, valid links and dropdown options in each variant of the sample page
+VARIANTS = {
+    'sample': {'items': 4, 'links': 3, 'options': 6},
+    'items-10k': {'items': 10000, 'links': 3, 'options': 6},
+    'links-5k': {'items': 4, 'links': 5000, 'options': 6},
+    'options-5k': {'items': 4, 'links': 3, 'options': 5000},
+}
+
+
+class _Handler(SimpleHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # keep-alive responses are written in several parts, which Nagle's algorithm would hold back
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith('/links/'):
+            self._link()
+            self.wfile.write(b'ok')
+        else:
+            SimpleHTTPRequestHandler.do_GET(self)
+
+    def do_HEAD(self):
+        if self.path.startswith('/links/'):
+            self._link()
+        else:
+            SimpleHTTPRequestHandler.do_HEAD(self)
+
+    def _link(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+
+    def translate_path(self, path):
+        path = SimpleHTTPRequestHandler.translate_path(self, path)
+        return os.path.join(self.server.root, os.path.relpath(path, os.getcwd()))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class SampleSite(object):
+    """Serves every variant of the sample page from a local HTTP server, at /<variant>/."""
+
+    def __init__(self, variants=None):
+        self.variants = variants or sorted(VARIANTS)
+        self.root = None
+        self.server = None
+
+    def start(self):
+        self.root = tempfile.mkdtemp(prefix='casszilla-bench-')
+        with open(os.path.join(SAMPLE_DIR, 'index.html')) as f:
+            sample = f.read()
+        for name in self.variants:
+            directory = os.path.join(self.root, name)
+            os.makedirs(directory)
+            soup = BeautifulSoup(sample, 'html.parser')
+            _scale(soup, '#item-list', VARIANTS[name]['items'])
+            _scale(soup, '#valid-links', VARIANTS[name]['links'])
+            _scale(soup, '#dropdown', VARIANTS[name]['options'])
+            _number_links(soup)
+            _offline(soup)
+            with open(os.path.join(directory, 'index.html'), 'w') as f:
+                f.write(str(soup))
+            for asset in ASSETS:
+                shutil.copy(os.path.join(SAMPLE_DIR, asset), directory)
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.root = self.root
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def url(self, variant):
+        return 'http://127.0.0.1:%s/%s/' % (self.server.server_address[1], variant)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from pages import scripts
+from pages.static import StaticDriver
+
+
+class StandInDriver(StaticDriver):
+    """
+    A local stand-in for a WebDriver browser, for benchmarking.
+    It is the static backend, except that it also accepts the commands that need a browser: clicks,
+    typing and selecting change the parsed page, and everything else (mouse moves, resizing, other
+    scripts) is accepted and ignored. It still runs no JavaScript.
+    """
+
+    session_id = 'standin'
+
+    def __init__(self):
+        StaticDriver.__init__(self)
+        self._script_handlers[scripts.SELECT_OPTION] = self._select_option
+
+    def execute(self, driver_command, params=None):
+        if not hasattr(self, '_command_' + driver_command):
+            return {'value': None}
+        return StaticDriver.execute(self, driver_command, params)
+
+    def _command_clickElement(self, element):
+        if element.tag.name == 'option':
+            self._choose(element.tag)
+
+    def _command_clearElement(self, element):
+        element.tag['value'] = ''
+
+    def _command_sendKeysToElement(self, element, text):
+        element.tag['value'] = element.tag.get('value', '') + text
+
+    def _command_executeScript(self, script, args):
+        if script not in self._script_handlers:
+            return None
+        return StaticDriver._command_executeScript(self, script, args)
+
+    _command_executeAsyncScript = _command_executeScript
+
+    def _command_setWindowSize(self, width, height):
+        self.window_size = {'width': width, 'height': height}
+
+    def _select_option(self, root, by, value, match, target):
+        selects = self._find_all(root, by, value)
+        if not selects:
+            return None
+        options = selects[0].find_all('option')
+        if match == 'index':
+            options = 0 <= target < len(options) and [options[target]] or []
+        else:
+            read = match == 'value' and (lambda option: self._attribute(option, 'value')) or self._text
+            options = [option for option in options if read(option) == target]
+        if not options:
+            return False
+        self._choose(options[0])
+        return True
+
+    def _choose(self, option):
+        select = option.find_parent('select')
+        if select is not None:
+            for other in select.find_all('option'):
+                if 'selected' in other.attrs:
+                    del other['selected']
+        option['selected'] = 'selected'
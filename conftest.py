@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import os
+
+import pytest
+
+from tests.base_test import BaseTest
+
+
+class StaticBackend(object):
+    """Gives tests marked static a driver that reads the parsed html of the page, once pytest-mozwebqa has set them up."""
+
+    @pytest.mark.trylast
+    def pytest_runtest_setup(self, item):
+        if 'static' in item.keywords:
+            from pytest_mozwebqa.pytest_mozwebqa import TestSetup
+            from pages.static import StaticDriver
+            TestSetup.selenium = StaticDriver()
+            TestSetup.default_implicit_wait = 0
+
+
+class DriverRecording(object):
+    """Records the WebDriver commands of each test, and keeps the recordings of the tests that pass."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.recorders = {}
+        self.passed = {}
+
+    @pytest.mark.trylast
+    def pytest_runtest_setup(self, item):
+        from pytest_mozwebqa.pytest_mozwebqa import TestSetup
+        from pages.replay import Recorder
+        selenium = getattr(TestSetup, 'selenium', None)
+        if 'skip_selenium' not in item.keywords and hasattr(selenium, 'command_executor'):
+            self.recorders[item.nodeid] = recorder = Recorder()
+            recorder.instrument(selenium)
+            self.passed[item.nodeid] = True
+
+    def pytest_runtest_logreport(self, report):
+        recorder = self.recorders.get(report.nodeid)
+        if recorder is None:
+            return
+        self.passed[report.nodeid] = self.passed[report.nodeid] and report.passed
+        if report.when == 'teardown':
+            del self.recorders[report.nodeid]
+            if self.passed.pop(report.nodeid):
+                from pytest_mozwebqa.pytest_mozwebqa import TestSetup
+                from pages.replay import recording_path
+                recorder.save(recording_path(self.directory, report.nodeid), report.nodeid,
+                              TestSetup.default_implicit_wait)
+
+
+class DriverReplay(object):
+    """Runs the tests that use a browser against their recordings instead, with no browser or network."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.replayed = set()
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        for item in items:
+            runs_static = 'static' in item.keywords and not config.option.static_in_browser
+            if 'skip_selenium' not in item.keywords and not runs_static:
+                self.replayed.add(item.nodeid)
+                item.keywords['skip_selenium'] = True
+
+    @pytest.mark.trylast
+    def pytest_runtest_setup(self, item):
+        if item.nodeid in self.replayed:
+            from pytest_mozwebqa.pytest_mozwebqa import TestSetup
+            from pages.replay import ReplayDriver, recording_path
+            path = recording_path(self.directory, item.nodeid)
+            if not os.path.exists(path):
+                pytest.skip('There is no recording of this test in %s.' % self.directory)
+            TestSetup.selenium = ReplayDriver(path)
+            TestSetup.default_implicit_wait = TestSetup.selenium.command_executor.implicit_wait
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('casszilla', 'casszilla')
+    group.addoption('--link-cache',
+                    action='store',
+                    dest='link_cache',
+                    metavar='path',
+                    help='file to keep link check results in between runs.')
+    group.addoption('--link-cache-ttl',
+                    action='store',
+                    type='int',
+                    dest='link_cache_ttl',
+                    default=24 * 60 * 60,
+                    metavar='seconds',
+                    help='age after which a cached link check is revalidated. (default: %default)')
+    group.addoption('--link-cache-size',
+                    action='store',
+                    type='int',
+                    dest='link_cache_size',
+                    default=5000,
+                    metavar='num',
+                    help='maximum number of cached link checks. (default: %default)')
+    group.addoption('--link-recheck',
+                    action='store',
+                    dest='link_recheck',
+                    default='stale',
+                    choices=['stale', 'all'],
+                    help='recheck only stale or failed links, or revalidate all of them. (default: %default)')
+    group.addoption('--crawl-depth',
+                    action='store',
+                    type='int',
+                    dest='crawl_depth',
+                    default=2,
+                    metavar='num',
+                    help='number of links to follow from the start page when crawling the site. (default: %default)')
+    group.addoption('--crawl-checkpoint',
+                    action='store',
+                    dest='crawl_checkpoint',
+                    metavar='path',
+                    help='file to save crawl progress in, so that an interrupted crawl continues where it stopped.')
+    group.addoption('--reuse-sessions',
+                    action='store_true',
+                    dest='reuse_sessions',
+                    default=False,
+                    help='keep browsers open between nondestructive tests.')
+    group.addoption('--driver-profile',
+                    action='store',
+                    dest='driver_profile',
+                    metavar='path',
+                    help='record every WebDriver command and write a per test and per page object method report.')
+    group.addoption('--page-timing',
+                    action='store',
+                    dest='page_timing',
+                    metavar='path',
+                    help='record the navigation, paint and resource timing of every page load and add it to this history file.')
+    group.addoption('--load-budget-ms',
+                    action='store',
+                    type='int',
+                    dest='load_budget_ms',
+                    metavar='ms',
+                    help='fail a test when the p95 load time of a page it opens exceeds this many milliseconds.')
+    group.addoption('--bytes-budget',
+                    action='store',
+                    type='int',
+                    dest='bytes_budget',
+                    metavar='bytes',
+                    help='fail a test when the p95 total transfer size of a page it opens exceeds this many bytes.')
+    group.addoption('--record-driver',
+                    action='store',
+                    dest='record_driver',
+                    metavar='path',
+                    help='record the WebDriver commands of every passing test in this directory.')
+    group.addoption('--replay-driver',
+                    action='store',
+                    dest='replay_driver',
+                    metavar='path',
+                    help='run tests against the recordings in this directory instead of a browser.')
+    group.addoption('--incremental',
+                    action='store',
+                    dest='incremental',
+                    metavar='path',
+                    help='skip nondestructive tests whose pages and code are unchanged since they last passed, '
+                         'keeping the fingerprints of passing tests in this file.')
+    group.addoption('--full-run',
+                    action='store_true',
+                    dest='full_run',
+                    default=False,
+                    help='run every test even with --incremental, and refresh the stored fingerprints.')
+    group.addoption('--check-locators',
+                    action='store_true',
+                    dest='check_locators',
+                    default=False,
+                    help='report page object locators that match no element, or several, on their pages before any test runs.')
+    group.addoption('--visual-baselines',
+                    action='store',
+                    dest='visual_baselines',
+                    metavar='path',
+                    help='compare visual snapshots with the baselines in this directory, storing new ones there.')
+    group.addoption('--update-visual-baselines',
+                    action='store_true',
+                    dest='update_visual_baselines',
+                    default=False,
+                    help='store every visual snapshot as its new baseline instead of comparing it.')
+    group.addoption('--visual-tolerance',
+                    action='store',
+                    type='int',
+                    dest='visual_tolerance',
+                    default=16,
+                    metavar='num',
+                    help='largest difference of a colour channel that does not count as a change in a visual snapshot. (default: %default)')
+    group.addoption('--shards',
+                    action='store',
+                    type='int',
+                    dest='shards',
+                    metavar='num',
+                    help='run the tests in this many worker processes, balanced by their recorded durations.')
+    group.addoption('--shard-durations',
+                    action='store',
+                    dest='shard_durations',
+                    default='.shard-durations.json',
+                    metavar='path',
+                    help='file to keep test durations in for balancing --shards. (default: %default)')
+    group.addoption('--shard-file',
+                    action='store',
+                    dest='shard_file',
+                    metavar='path',
+                    help='run only the tests listed in this file; used by the --shards workers.')
+    group.addoption('--shard-report',
+                    action='store',
+                    dest='shard_report',
+                    metavar='path',
+                    help='file to write the test reports of a --shards worker to.')
+    group.addoption('--static-in-browser',
+                    action='store_true',
+                    dest='static_in_browser',
+                    default=False,
+                    help='run tests marked static in a browser instead of against the parsed html.')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'fresh_session: give the test a browser of its own even when ' \
+        '--reuse-sessions is used, for nondestructive tests that change browser state.')
+    config.addinivalue_line(
+        'markers', 'static: the test only reads server-rendered markup, so it runs against ' \
+        'the parsed html of the page instead of a browser.')
+    config.addinivalue_line(
+        'markers', 'external: the test checks resources outside the pages it opens, ' \
+        'so --incremental always runs it.')
+    if not config.option.static_in_browser:
+        config.pluginmanager.register(StaticBackend(), 'static_backend')
+    if config.option.record_driver:
+        if config.option.reuse_sessions:
+            # a shared browser makes what a test sends depend on the tests that ran before it
+            raise pytest.UsageError('--record-driver cannot be combined with --reuse-sessions.')
+        if not os.path.isdir(config.option.record_driver):
+            os.makedirs(config.option.record_driver)
+        config.pluginmanager.register(DriverRecording(config.option.record_driver), 'driver_recording')
+    if config.option.replay_driver:
+        config.pluginmanager.register(DriverReplay(config.option.replay_driver), 'driver_replay')
+    if config.option.incremental:
+        from tests.incremental import IncrementalRun
+        config._incremental_run = IncrementalRun(config.option.incremental, config.option.full_run)
+        config.pluginmanager.register(config._incremental_run, 'incremental_run')
+    if config.option.shards:
+        from tests.sharding import ShardController
+        config.pluginmanager.register(ShardController(config.option.shards, config.option.shard_durations),
+                                      'shard_controller')
+    if config.option.shard_file:
+        from tests.sharding import ShardWorker
+        config.pluginmanager.register(ShardWorker(config.option.shard_file, config.option.shard_report),
+                                      'shard_worker')
+    if config.option.reuse_sessions:
+        from tests.session_pool import SessionPool
+        config._session_pool = SessionPool()
+        config._session_pool.install()
+    if config.option.driver_profile:
+        from pages import instrumentation
+        instrumentation.profiler = instrumentation.CommandProfiler()
+    if config.option.page_timing or config.option.load_budget_ms is not None \
+            or config.option.bytes_budget is not None:
+        from pages import timing
+        timing.recorder = timing.TimingRecorder(config.option.page_timing,
+                                                load_budget_ms=config.option.load_budget_ms,
+                                                bytes_budget=config.option.bytes_budget)
+    if config.option.visual_baselines:
+        from pages import visual
+        visual.baselines = visual.BaselineStore(config.option.visual_baselines,
+                                                tolerance=config.option.visual_tolerance,
+                                                update=config.option.update_visual_baselines)
+    BaseTest.crawl_depth = config.option.crawl_depth
+    BaseTest.crawl_checkpoint = config.option.crawl_checkpoint
+    if config.option.link_cache:
+        from tests.link_cache import LinkCache
+        BaseTest.link_cache = LinkCache(config.option.link_cache,
+                                        ttl=config.option.link_cache_ttl,
+                                        max_entries=config.option.link_cache_size,
+                                        recheck=config.option.link_recheck)
+
+
+def pytest_collection_modifyitems(session, config, items):
+    if not config.option.static_in_browser:
+        for item in items:
+            if 'static' in item.keywords:
+                # keep pytest-mozwebqa from starting a browser for the test
+                item.keywords['skip_selenium'] = True
+    if config.option.check_locators:
+        check_locators(config, items)
+
+
+def check_locators(config, items):
+    """Report the locators of the collected tests' page objects that match no element, or several, on their pages."""
+    import inspect
+    import requests
+    from pages.page import Page
+    from pages.locators import LocatorIndex, page_locators
+    pages = set()
+    for item in items:
+        module = getattr(item, 'module', None)
+        for value in vars(module).values() if module is not None else []:
+            if inspect.isclass(value) and issubclass(value, Page):
+                pages.add(value)
+    reporter = config.pluginmanager.getplugin('terminalreporter')
+    base_url = config.option.base_url or ''
+    for page_class in sorted(pages, key=lambda page_class: page_class.__name__):
+        url = base_url + getattr(page_class, '_page_url_suffix', '')
+        try:
+            index = LocatorIndex(requests.get(url, timeout=config.option.webqatimeout).content)
+        except requests.RequestException as e:
+            reporter.write_line('Could not check the locators of %s: %s' % (page_class.__name__, e))
+            continue
+        problems = index.problems(page_locators(page_class))
+        if problems:
+            reporter.write_sep('-', 'Locators of %s that do not match %s' % (page_class.__name__, url))
+            for line in problems:
+                reporter.write_line(line)
+
+
+@pytest.mark.tryfirst
+def pytest_runtest_setup(item):
+    pool = getattr(item.config, '_session_pool', None)
+    if pool is not None:
+        pool.reuse_next = pool.should_reuse(item)
+    from pages import instrumentation
+    if instrumentation.profiler is not None:
+        instrumentation.profiler.current_test = item.nodeid
+    from pages import timing
+    if timing.recorder is not None:
+        timing.recorder.current_test = item.nodeid
+
+
+def pytest_terminal_summary(terminalreporter):
+    if terminalreporter.config.option.shard_file:
+        # a --shards worker hands what it recorded to the controller, which reports and saves it
+        return
+    from pages import instrumentation
+    if instrumentation.profiler is not None:
+        path = terminalreporter.config.option.driver_profile
+        instrumentation.profiler.write_report(path)
+        terminalreporter.write_sep('-', 'WebDriver commands by page object method')
+        for line in instrumentation.profiler.summary_lines():
+            terminalreporter.write_line(line)
+        terminalreporter.write_line('Full report written to %s' % path)
+    from pages import timing
+    if timing.recorder is not None and timing.recorder.loads:
+        terminalreporter.write_sep('-', 'Page load timing')
+        for line in timing.recorder.summary_lines():
+            terminalreporter.write_line(line)
+
+
+def pytest_unconfigure(config):
+    pool = getattr(config, '_session_pool', None)
+    if pool is not None:
+        pool.close()
+    BaseTest.close_link_checkers()
+    if config.option.shard_file:
+        return
+    if BaseTest.link_cache is not None:
+        BaseTest.link_cache.save()
+    incremental_run = getattr(config, '_incremental_run', None)
+    if incremental_run is not None:
+        incremental_run.save()
+    from pages import timing
+    if timing.recorder is not None:
+        timing.recorder.save()
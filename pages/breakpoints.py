@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Works out the window widths at which a site's layout changes, from its CSS media queries."""
+
+import math
+import re
+from collections import OrderedDict
+
+# The prelude of every @media rule in a stylesheet
+MEDIA_RULE = re.compile(r'@media\s+([^{;]+)\{')
+# A width feature of a media query, such as min-width: 600px or max-width:40em
+WIDTH_FEATURE = re.compile(r'\(\s*(min|max)-width\s*:\s*([\d.]+)\s*(px|em|rem)?\s*\)', re.IGNORECASE)
+COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+# Browsers size em and rem in media queries from their default font size
+PIXELS_PER_EM = 16
+
+
+def media_queries(css):
+    """Return the media query of every @media rule in the css."""
+    return [query.strip() for query in MEDIA_RULE.findall(COMMENT.sub('', css))]
+
+
+def boundaries(queries):
+    """Return the sorted widths, in pixels, at which the result of any of the media queries changes."""
+    widths = set()
+    for query in queries:
+        for kind, number, unit in WIDTH_FEATURE.findall(query):
+            width = float(number)
+            if unit.lower() in ('em', 'rem'):
+                width *= PIXELS_PER_EM
+            if kind.lower() == 'min':
+                # min-width: 600px first applies at 600px
+                widths.add(int(math.ceil(width)))
+            else:
+                # max-width: 599px last applies at 599px
+                widths.add(int(math.floor(width)) + 1)
+    return sorted(widths)
+
+
+def breakpoint_widths(queries, min_width=320, max_width=1400):
+    """
+    Return the smallest list of widths between min_width and max_width that shows every layout the
+    media queries allow: the narrowest width of each range in which none of them changes.
+    """
+    widths = [min_width]
+    for width in boundaries(queries):
+        if min_width < width <= max_width:
+            widths.append(width)
+    return widths
+
+
+class BreakpointSweep(object):
+    """The visibility of a set of named locators at each width of a breakpoint sweep."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.visibility = OrderedDict()
+
+    def add(self, width, visible):
+        """Record the visibility of each locator, in the order of names, at the width."""
+        self.visibility[width] = OrderedDict(zip(self.names, visible))
+
+    @property
+    def widths(self):
+        return list(self.visibility)
+
+    def is_visible(self, width, name):
+        """Return true if the named element was displayed at the width, and None if it was not found."""
+        return self.visibility[width][name]
+
+    def changes(self):
+        """Return (width, appeared, disappeared) for each width at which elements appear or disappear."""
+        changes = []
+        previous = None
+        for width, visible in self.visibility.items():
+            if previous is not None:
+                appeared = [name for name in self.names if visible[name] and not previous[name]]
+                disappeared = [name for name in self.names if previous[name] and not visible[name]]
+                if appeared or disappeared:
+                    changes.append((width, appeared, disappeared))
+            previous = visible
+        return changes
+
+    def report_lines(self):
+        """Return a line for each width at which elements appear or disappear."""
+        lines = []
+        for width, appeared, disappeared in self.changes():
+            parts = []
+            if appeared:
+                parts.append('shows %s' % ', '.join(appeared))
+            if disappeared:
+                parts.append('hides %s' % ', '.join(disappeared))
+            lines.append('At %spx the page %s.' % (width, ' and '.join(parts)))
+        return lines
@@ -18,6 +18,8 @@ class HomePage(Base):
     _page_url_suffix = ''
     # The title of this page, which is used by is_the_current_page() in page.py
     _page_title = u'Casszilla!'
+    # The form and dropdown helpers look up the same elements several times
+    _cache_elements = True
 
     # Locators for the home page
     _page_header = (By.ID, 'page-header')
@@ -77,6 +79,11 @@ class HomePage(Base):
         return [self.ListItem(self.testsetup, web_element)
                 for web_element in self.find_elements(self._list_items_locator)]
 
+    @property
+    def list_item_snapshots(self):
+        """Return a read-only record of every list item on the home page, read in a single call."""
+        return self.ListItem.snapshots(self, self._list_items_locator)
+
     class ListItem(PageRegion):
         """Allows each list item on the home page to be treated as a separate object."""
 
@@ -84,6 +91,12 @@ class HomePage(Base):
         _item_excerpt_locator = (By.CSS_SELECTOR, '.excerpt')
         _item_link_locator = (By.CSS_SELECTOR, '.item-link')
 
+        _snapshot_fields = [
+            ('title', 'text', _item_title_locator),
+            ('excerpt_present', 'present', _item_excerpt_locator),
+            ('link_present', 'present', _item_link_locator),
+        ]
+
         @property
         def title(self):
             """Return the title of the list item."""
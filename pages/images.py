@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Reads the format, dimensions and size of images from the first bytes of each file."""
+
+import re
+import struct
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+# Bytes fetched from each image, which is enough to reach the dimensions of every format read here,
+# unless a JPEG carries more metadata than that; those are fetched again up to MAX_HEADER_BYTES
+HEADER_BYTES = 8192
+MAX_HEADER_BYTES = 128 * 1024
+
+ImageHeader = namedtuple('ImageHeader', 'format width height')
+ImageReport = namedtuple('ImageReport', 'src format width height bytes rendered_width rendered_height problems')
+
+
+def _jpeg_header(data):
+    # the dimensions are in the first start of frame segment, after any metadata segments
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset:offset + 1] != b'\xff':
+            return None
+        marker = ord(data[offset + 1:offset + 2])
+        if marker == 0xff:
+            offset += 1
+            continue
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return ImageHeader('jpeg', width, height)
+        offset += 2 + length
+    # the metadata segments run past the end of the data
+    return ImageHeader('jpeg', None, None)
+
+
+def _webp_header(data):
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        width, height = struct.unpack('<HH', data[26:30])
+        return ImageHeader('webp', width & 0x3fff, height & 0x3fff)
+    if chunk == b'VP8L' and len(data) >= 25:
+        bits = struct.unpack('<I', data[21:25])[0]
+        return ImageHeader('webp', (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1)
+    if chunk == b'VP8X' and len(data) >= 30:
+        width = struct.unpack('<I', data[24:27] + b'\x00')[0] + 1
+        height = struct.unpack('<I', data[27:30] + b'\x00')[0] + 1
+        return ImageHeader('webp', width, height)
+    return None
+
+
+def image_header(data):
+    """
+    Return the format, width and height of the image that data starts with, or None if it is not
+    recognised. The width and height of a JPEG are None when its metadata runs past the end of data.
+    """
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        width, height = struct.unpack('<HH', data[6:10])
+        return ImageHeader('gif', width, height)
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR' and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return ImageHeader('png', width, height)
+    if data[:2] == b'\xff\xd8':
+        return _jpeg_header(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _webp_header(data)
+    return None
+
+
+def declared_size(response):
+    """Return the size of the whole file from the headers of a response to a range request, or None."""
+    content_range = response.headers.get('content-range', '')
+    match = re.search(r'/(\d+)$', content_range)
+    if match:
+        return int(match.group(1))
+    if response.status_code == requests.codes.ok and response.headers.get('content-length'):
+        return int(response.headers['content-length'])
+    return None
+
+
+def _fetch_start(url, length, timeout, session):
+    response = session.get(url, headers={'Range': 'bytes=0-%s' % (length - 1)},
+                           stream=True, timeout=timeout, verify=False)
+    try:
+        if response.status_code not in (requests.codes.ok, requests.codes.partial_content):
+            return None, None
+        # a server that ignores the range sends the whole file, of which only the start is read
+        return response.raw.read(length), declared_size(response)
+    finally:
+        response.close()
+
+
+def fetch_header(url, timeout, session=None):
+    """
+    Return the ImageHeader and declared size in bytes of the image at the url, reading no more than
+    HEADER_BYTES of it, or MAX_HEADER_BYTES of a JPEG with a lot of metadata. Both are None when the
+    image cannot be fetched.
+    """
+    session = session or requests
+    try:
+        data, size = _fetch_start(url, HEADER_BYTES, timeout, session)
+        if data is None:
+            return None, None
+        header = image_header(data)
+        if header is not None and header.width is None and len(data) == HEADER_BYTES:
+            data, size = _fetch_start(url, MAX_HEADER_BYTES, timeout, session)
+            header = data is not None and image_header(data) or header
+        return header, size
+    except requests.RequestException:
+        return None, None
+
+
+def fetch_headers(urls, timeout, workers=8):
+    """Return a dict mapping each of the urls to its (ImageHeader, declared size), fetched concurrently."""
+    urls = sorted(set(urls))
+    if not urls:
+        return {}
+    session = requests.Session()
+    pool = ThreadPool(min(workers, len(urls)))
+    try:
+        results = pool.map(lambda url: fetch_header(url, timeout, session), urls)
+    finally:
+        pool.close()
+        pool.join()
+        session.close()
+    return dict(zip(urls, results))
+
+
+def problems(header, size, rendered_width, rendered_height, pixel_ratio=1,
+             max_scale=1.5, max_bytes=200 * 1024, max_bytes_per_pixel=1.0):
+    """
+    Return what is wrong with an image: more pixels than its rendered size needs at the device pixel
+    ratio (by more than max_scale), more than max_bytes, or more than max_bytes_per_pixel, which a
+    well compressed image does not need.
+    """
+    found = []
+    if header is None and size is None:
+        return ['it could not be fetched']
+    if header is None:
+        return ['its format is not GIF, PNG, JPEG or WebP']
+    if header.width is None:
+        found.append('its %s metadata is too large: the dimensions are not in its first %s KB'
+                     % (header.format.upper(), MAX_HEADER_BYTES // 1024))
+    elif rendered_width and rendered_height:
+        needed_width = rendered_width * pixel_ratio
+        needed_height = rendered_height * pixel_ratio
+        if header.width > needed_width * max_scale or header.height > needed_height * max_scale:
+            found.append('it is %sx%s pixels but shown at %sx%s' % (
+                header.width, header.height, rendered_width, rendered_height))
+    if size is not None:
+        if size > max_bytes:
+            found.append('it is %s KB, over %s KB' % (size // 1024, max_bytes // 1024))
+        pixels = header.width and header.width * header.height
+        if pixels and float(size) / pixels > max_bytes_per_pixel:
+            found.append('its %s uses %.1f bytes per pixel' % (header.format.upper(), float(size) / pixels))
+    return found
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import inspect
+import json
+import math
+import time
+
+# The profiler that Page instruments its driver with, set by conftest.py for --driver-profile
+profiler = None
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of the values, e.g. fraction=0.95 for p95."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, int(math.ceil(fraction * len(values))) - 1))
+    return values[index]
+
+
+def summarize(latencies):
+    """Return the count, total, p50, p95 and max of a list of latencies in seconds, in milliseconds."""
+    return {
+        'count': len(latencies),
+        'total_ms': round(sum(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+    }
+
+
+class CommandProfiler(object):
+    """
+    Records every WebDriver command a test sends, with its latency, locator and the page object
+    method that sent it.
+    """
+
+    def __init__(self):
+        self.current_test = None
+        self.records = []
+
+    def instrument(self, selenium):
+        """Wrap the driver's command executor so that every command is recorded, and return the driver."""
+        if selenium is None or getattr(selenium, '_command_profiler', None) is self:
+            return selenium
+        execute = selenium.execute
+        profiler = self
+
+        def profiled_execute(driver_command, params=None):
+            start = time.time()
+            try:
+                return execute(driver_command, params)
+            finally:
+                profiler.record(driver_command, params, time.time() - start)
+
+        selenium.execute = profiled_execute
+        selenium._command_profiler = self
+        return selenium
+
+    def record(self, command, params, latency):
+        locator = None
+        if params and 'using' in params:
+            locator = [params['using'], params.get('value')]
+        self.records.append({
+            'test': self.current_test,
+            'command': command,
+            'locator': locator,
+            'method': self._caller(),
+            'latency': latency,
+        })
+
+    def _caller(self):
+        """Return the outermost page object method on the stack, which is the one the test called."""
+        import page
+        caller = None
+        frame = inspect.currentframe()
+        try:
+            while frame is not None:
+                instance = frame.f_locals.get('self')
+                if isinstance(instance, page.Page):
+                    caller = '%s.%s' % (type(instance).__name__, frame.f_code.co_name)
+                frame = frame.f_back
+        finally:
+            del frame
+        return caller or '(test)'
+
+    def report(self):
+        """Return the recorded commands aggregated per test, per page object method and per command."""
+        tests, methods, commands = {}, {}, {}
+        for record in self.records:
+            test = tests.setdefault(record['test'], {'latencies': [], 'methods': {}})
+            test['latencies'].append(record['latency'])
+            test['methods'].setdefault(record['method'], []).append(record['latency'])
+            methods.setdefault(record['method'], []).append(record['latency'])
+            commands.setdefault(record['command'], []).append(record['latency'])
+        return {
+            'tests': dict((name, dict(summarize(test['latencies']), methods=dict(
+                (method, summarize(latencies)) for method, latencies in test['methods'].items())))
+                for name, test in tests.items()),
+            'methods': dict((name, summarize(latencies)) for name, latencies in methods.items()),
+            'commands': dict((name, summarize(latencies)) for name, latencies in commands.items()),
+        }
+
+    def write_report(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+    def summary_lines(self, limit=10):
+        """Return a short table of the page object methods that spent the most time in the driver."""
+        methods = self.report()['methods']
+        lines = ['%-50s %8s %10s %8s %8s %8s' % ('page object method', 'commands', 'total ms', 'p50 ms', 'p95 ms', 'max ms')]
+        for name in sorted(methods, key=lambda name: -methods[name]['total_ms'])[:limit]:
+            stats = methods[name]
+            lines.append('%-50s %8d %10.1f %8.1f %8.1f %8.1f' % (
+                name, stats['count'], stats['total_ms'], stats['p50_ms'], stats['p95_ms'], stats['max_ms']))
+        return lines
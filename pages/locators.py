@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""Checks the locators of page objects against the html of their pages, without a browser."""
+
+import inspect
+import re
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+from page import Page, PageRegion
+from static import PARSER
+
+# A locator of a page object: where it is declared, the locator tuple, and whether it is relative to
+# a region of the page and may match more than one element
+Locator = namedtuple('Locator', 'owner name locator relative multiple')
+
+# Css selectors that the index answers without a selector engine: tag, #id, .class and tag.class
+SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][\w-]*)?(?:#([\w-]+)|\.([\w-]+))?$')
+
+
+def _is_locator(value):
+    return isinstance(value, tuple) and len(value) == 2 and all(isinstance(part, (str, type(u''))) for part in value)
+
+
+def _multiple_allowed(cls, name):
+    """Return true if the page object reads every element at the locator, rather than just the first."""
+    try:
+        source = inspect.getsource(cls)
+    except (IOError, TypeError):
+        return False
+    return re.search(r'(find_elements|snapshots)\([^)]*self\.%s\b' % re.escape(name), source) is not None
+
+
+def page_locators(page_class, relative=False):
+    """
+    Return every locator declared by the page object and the page objects nested in it: each
+    _..._locator attribute, and the 'locator' of each entry of a list attribute.
+    """
+    locators = []
+    owner = page_class.__name__
+    for name in sorted(dir(page_class)):
+        value = getattr(page_class, name, None)
+        if name.endswith('_locator') and _is_locator(value):
+            locators.append(Locator(owner, name, value, relative, _multiple_allowed(page_class, name)))
+        elif isinstance(value, list):
+            for index, entry in enumerate(value):
+                if isinstance(entry, dict) and _is_locator(entry.get('locator')):
+                    locators.append(Locator(owner, '%s[%s]' % (name, index), entry['locator'], relative, False))
+        elif inspect.isclass(value) and issubclass(value, Page) and name != '__class__':
+            for locator in page_locators(value, relative or issubclass(value, PageRegion)):
+                locators.append(locator._replace(owner='%s.%s' % (owner, locator.owner)))
+    return locators
+
+
+class LocatorIndex(object):
+    """An index of the ids, classes, tags and names of a parsed page, which resolves locators in bulk."""
+
+    def __init__(self, html):
+        self.soup = BeautifulSoup(html, PARSER)
+        self.ids, self.classes, self.tags, self.names = {}, {}, {}, {}
+        for tag in self.soup.find_all(True):
+            self.tags.setdefault(tag.name, []).append(tag)
+            if tag.get('id'):
+                self.ids.setdefault(tag['id'], []).append(tag)
+            for class_name in tag.get('class') or []:
+                self.classes.setdefault(class_name, []).append(tag)
+            if tag.get('name'):
+                self.names.setdefault(tag['name'], []).append(tag)
+
+    def count(self, locator):
+        """Return the number of elements that match the locator, or None if it cannot be resolved offline."""
+        by, value = locator
+        if by == 'id':
+            return len(self.ids.get(value, []))
+        if by == 'class name':
+            return len(self.classes.get(value, []))
+        if by == 'tag name':
+            return len(self.tags.get(value.lower(), []))
+        if by == 'name':
+            return len(self.names.get(value, []))
+        if by == 'css selector':
+            match = SIMPLE_SELECTOR.match(value.strip())
+            if match and any(match.groups()):
+                tag_name, id_value, class_name = match.groups()
+                if id_value:
+                    tags = self.ids.get(id_value, [])
+                elif class_name:
+                    tags = self.classes.get(class_name, [])
+                else:
+                    tags = self.tags.get(tag_name.lower(), [])
+                return len([tag for tag in tags if not tag_name or tag.name == tag_name.lower()])
+            return len(self.soup.select(value))
+        if by in ('link text', 'partial link text'):
+            texts = [re.sub(r'\s+', ' ', a.get_text()).strip() for a in self.tags.get('a', [])]
+            return len([text for text in texts if (by == 'link text' and text == value) or
+                        (by == 'partial link text' and value in text)])
+        return None
+
+    def problems(self, locators):
+        """Return a line for each locator that matches no element, or several where one is expected."""
+        lines = []
+        for locator in locators:
+            count = self.count(locator.locator)
+            where = "%s.%s %s='%s'" % (locator.owner, locator.name, locator.locator[0], locator.locator[1])
+            if count == 0:
+                lines.append('%s matches no element.' % where)
+            elif count is not None and count > 1 and not (locator.relative or locator.multiple):
+                lines.append('%s matches %s elements, but only the first is used.' % (where, count))
+        return lines
@@ -4,6 +4,10 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import time
+from collections import namedtuple
+from collections import OrderedDict
+from contextlib import contextmanager
+
 import requests
 
 from selenium.webdriver.support.ui import WebDriverWait
@@ -11,82 +15,311 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import ElementNotVisibleException
 from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import WebDriverException
 from unittestzero import Assert
 from requests.exceptions import Timeout
 
+import breakpoints
+import images
+import instrumentation
+import scripts
+import timing
+import visual
+
+# The driver commands that look elements up, and so wait for them implicitly
+LOOKUP_COMMANDS = ('findElement', 'findElements', 'findChildElement', 'findChildElements')
+
+# Words of the errors of browsers that cannot run the asynchronous wait script
+UNSUPPORTED_SCRIPT_MESSAGES = ('unknown command', 'not implemented', 'not supported', 'unsupported',
+                               'mutationobserver')
+
 
 class Page(object):
     """Base class for all Pages"""
 
+    # Waits poll from _poll_interval, doubling up to _max_poll_interval (in seconds)
+    _poll_interval = 0.05
+    _max_poll_interval = 0.5
+    # The implicit wait each browser session has, and how many zero_implicit_wait() blocks are open in it
+    _implicit_wait_state = {}
+    # The number of implicitly_wait calls that did not have to be sent to the browser, compared with
+    # turning the wait off and back on around every presence check
+    saved_driver_commands = 0
+
+    # What each browser session was last opened at, whether anything has interacted with it since, and
+    # what the page object found out about the browser, such as whether it can run asynchronous scripts
+    _navigation_state = {}
+
+    # Page objects that look up the same elements repeatedly can set _cache_elements to reuse
+    # element handles. The cache is cleared on open(), after every method that can change the page
+    # (clicks, typing, hovering, selecting and execute_script), and when a handle goes stale.
+    _cache_elements = False
+    _element_cache_size = 100
+
+    # The viewport widths swept by breakpoint_widths() on pages without width media queries
+    _sweep_widths = [500, 600, 700, 800, 900, 1000, 1100, 1200, 1300, 1400]
+
     def __init__(self, testsetup):
         """Constructor"""
 
         self.testsetup = testsetup
         self.base_url = testsetup.base_url
         self.selenium = testsetup.selenium
+        if instrumentation.profiler is not None:
+            self.selenium = instrumentation.profiler.instrument(self.selenium)
         self.timeout = testsetup.timeout
+        self._restore_implicit_wait_lazily()
         self._selenium_root = hasattr(self, '_root_element') and self._root_element or self.selenium
         self.mouse = ActionChains(self.selenium)
+        self._element_cache = OrderedDict()
+        self.element_cache_hits = 0
+        self.element_cache_misses = 0
 
-    def open(self, url_fragment):
-        """Open the specified url_fragment, which is relative to the base_url, in the current window."""
-        self.selenium.get(self.base_url + url_fragment)
+    def open(self, url_fragment, reload=False):
+        """
+        Open the specified url_fragment, which is relative to the base_url, in the current window.
+        If the browser is already showing that url and nothing has interacted with the page since it was
+        loaded, the page is reset (storage and scroll position) instead of loaded again.
+        Pass reload=True to always load it.
+        """
+        self.clear_element_cache()
+        url = self.base_url + url_fragment
+        state = self._navigation
+        if not reload and state.get('url') == url and state.get('clean') and self.selenium.current_url == url:
+            self.selenium.execute_script(scripts.RESET_PAGE_STATE)
+            return
+        self.selenium.get(url)
         self.is_the_current_page
+        state.update({'url': url, 'clean': True})
+        if timing.recorder is not None:
+            load = self.page_timing()
+            if load is not None:
+                timing.recorder.record(url, load)
+                for message in timing.recorder.over_budget(url):
+                    Assert.fail(message)
+
+    def page_timing(self):
+        """
+        Return the Navigation, Paint and Resource Timing metrics of the last page load: TTFB,
+        DOMContentLoaded, load, first paints, total bytes and each resource by size, or None when the
+        browser does not report them. If the load event has not ended yet, they are read again until it
+        has, or None is returned once self.timeout seconds have passed.
+        """
+        end_time = time.time() + self.timeout
+        interval = self._poll_interval
+        result = self.selenium.execute_script(scripts.READ_PAGE_TIMING)
+        while result == 'loading' and time.time() < end_time:
+            time.sleep(interval)
+            interval = min(interval * 2, self._max_poll_interval)
+            result = self.selenium.execute_script(scripts.READ_PAGE_TIMING)
+        return timing.page_load(result)
 
-    def select_option(self, value, locator):
-        self.is_element_present(locator)
-        dropdown = self.find_element(locator)
-        all_options = dropdown.find_elements_by_tag_name("option")
-        option_found = False
-        for option in all_options:
-            if option.get_attribute("value") == value:
-                option_found = True
-                option.click()
-                break
-        if option_found is False:
+    @property
+    def _session_key(self):
+        return getattr(self.selenium, 'session_id', None) or id(self.selenium)
+
+    @property
+    def _navigation(self):
+        return Page._navigation_state.setdefault(self._session_key, {})
+
+    def mark_page_dirty(self):
+        """Record that the page state has changed, so the next open() loads it again."""
+        self._navigation['clean'] = False
+
+    @staticmethod
+    def reset_session(selenium):
+        """
+        Clear what a test left in a browser session before the next test gets it: the cookies and the
+        local and session storage of the page it is on, and the window size from before any page
+        resized it. A page that had cookies is loaded again by the next open(), since it may show them.
+        """
+        key = getattr(selenium, 'session_id', None) or id(selenium)
+        state = Page._navigation_state.get(key, {})
+        if selenium.get_cookies():
+            selenium.delete_all_cookies()
+            state['clean'] = False
+        selenium.execute_script(scripts.RESET_PAGE_STATE)
+        if state.get('resized'):
+            selenium.set_window_size(state['window_size']['width'], state['window_size']['height'])
+            state['resized'] = False
+
+    def select_option(self, value, locator, match='value'):
+        """
+        Select the option of the dropdown at the specified locator whose value (or visible text, or index,
+        depending on match) is the given value. The selection is made with a single script call, however
+        many options the dropdown has, and fires the change event a user's selection would.
+        """
+        self.mark_page_dirty()
+        found = self._run_on_element(locator, scripts.SELECT_OPTION, match, value)
+        # change handlers may have replaced elements
+        self.clear_element_cache()
+        if not found:
             raise Exception("Could not select option '%s' because it was not found." % value)
 
+    def select_option_by_text(self, text, locator):
+        """Select the option of the dropdown at the specified locator with the given visible text."""
+        self.select_option(text, locator, match='text')
+
+    def select_option_by_index(self, index, locator):
+        """Select the option of the dropdown at the specified locator at the given position."""
+        self.select_option(index, locator, match='index')
+
+    def dropdown_options(self, locator):
+        """Return a (value, text) pair for every option of the dropdown at the specified locator."""
+        return [tuple(option) for option in self._run_on_element(locator, scripts.READ_OPTIONS)]
+
+    def _run_on_element(self, locator, script, *args):
+        """
+        Run a script that takes the root, by and value of a locator, followed by args, and returns null
+        when nothing matches. If the element is not on the page yet, wait for it the way find_element does.
+        """
+        root = getattr(self, '_root_element', None)
+        result = self._read_script(script, root, locator[0], locator[1], *args)
+        if result is None:
+            self.find_element(locator)
+            result = self._read_script(script, root, locator[0], locator[1], *args)
+        return result
+
     def resize_window(self, width, height = 900):
         """Resizes the window."""
+        self._remember_window_size()
         self.selenium.set_window_size(width, height)
 
     def maximize_window(self):
         """Maximizes the size of the window"""
+        self._remember_window_size()
         self.selenium.maximize_window()
 
-    def execute_script(self, script):
-        self.selenium.execute_script(script)
+    def resize_viewport(self, width, height=900):
+        """
+        Resize the window so that its viewport, which width media queries are evaluated against, is width
+        pixels wide. The window is wider than the viewport by the browser's borders, which are measured
+        after a resize and remembered for the session.
+        """
+        state = self._navigation
+        self.resize_window(width + state.get('border_width', 0), height)
+        viewport_width = self._read_script(scripts.READ_VIEWPORT_WIDTH)
+        if viewport_width != width:
+            state['border_width'] = state.get('border_width', 0) + width - viewport_width
+            self.resize_window(width + state['border_width'], height)
+
+    def _remember_window_size(self):
+        """Keep the window size from before the first resize, so reset_session() can put it back."""
+        state = self._navigation
+        if 'window_size' not in state:
+            state['window_size'] = self.selenium.get_window_size()
+        state['resized'] = True
+
+    def registered_locators(self):
+        """Return the name and locator of every _..._locator attribute of the page object, by name."""
+        locators = OrderedDict()
+        for name in sorted(dir(type(self))):
+            value = getattr(type(self), name)
+            if name.startswith('_') and name.endswith('_locator') and isinstance(value, tuple) and len(value) == 2:
+                locators[name] = value
+        return locators
+
+    def visibility(self, locators):
+        """
+        Return whether the element at each of the locators is displayed, read with a single script call.
+        The value is None for a locator that matches nothing.
+        """
+        if not locators:
+            return []
+        return self._read_script(scripts.READ_VISIBILITY, getattr(self, '_root_element', None),
+                                   [[by, value] for by, value in locators])
+
+    def media_queries(self):
+        """Return the media queries of every stylesheet on the page."""
+        queries, urls = self._read_script(scripts.READ_MEDIA_QUERIES)
+        for url in urls:
+            queries.extend(breakpoints.media_queries(requests.get(url, timeout=self.timeout).text))
+        return queries
+
+    def breakpoint_widths(self):
+        """
+        Return the narrowest viewport width of each range of widths in which the page's media queries
+        give the same layout, or _sweep_widths when the page has no width media queries.
+        """
+        widths = breakpoints.breakpoint_widths(self.media_queries())
+        return len(widths) > 1 and widths or list(self._sweep_widths)
+
+    def sweep_breakpoints(self, locators=None, widths=None, height=900):
+        """
+        Resize the viewport to each width at which the page's media queries change its layout, and
+        return a BreakpointSweep with the visibility of each named locator at every width. Each width
+        costs a single script call, however many locators there are. By default every registered locator
+        of the page object is swept.
+        """
+        if locators is None:
+            locators = self.registered_locators()
+        if widths is None:
+            widths = self.breakpoint_widths()
+        sweep = breakpoints.BreakpointSweep(locators)
+        for width in widths:
+            self.resize_viewport(width, height)
+            sweep.add(width, self.visibility(list(locators.values())))
+        return sweep
+
+    def execute_script(self, script, *args):
+        """
+        Run the script in the browser and return its result.
+        The script may change the page, so the next open() loads it again.
+        """
+        self.mark_page_dirty()
+        try:
+            return self._read_script(script, *args)
+        finally:
+            self.clear_element_cache()
+
+    def _read_script(self, script, *args):
+        """Run a script of the page object that only reads the page, and return its result."""
+        return self.selenium.execute_script(script, *args)
 
     def click_element(self, locator):
+        self.mark_page_dirty()
         try:
-            self.find_element(locator).click()
+            self.with_element(locator, lambda element: element.click())
+            # the click may have loaded another page
+            self.clear_element_cache()
             return True
         except NoSuchElementException:
             return False
 
     def input_text(self, text, locator):
+        self.mark_page_dirty()
         try:
-            self.clear_input(locator)
-            self.find_element(locator).send_keys(text)
+            # the clearing and the typing share one lookup; a handle the clearing made stale is found again
+            self.with_element(locator, lambda element: element.clear())
+            self.with_element(locator, lambda element: element.send_keys(text))
             return True
         except NoSuchElementException:
             return False
+        finally:
+            # input handlers may have replaced elements
+            self.clear_element_cache()
 
     def clear_input(self, locator):
+        self.mark_page_dirty()
         try:
-            self.find_element(locator).clear()
+            self.with_element(locator, lambda element: element.clear())
             return True
         except NoSuchElementException:
             return False
+        finally:
+            self.clear_element_cache()
 
     def hover_element(self, locator):
         """Hover the cursor over an element"""
+        self.mark_page_dirty()
         try:
-            element = self.find_element(locator)
-            self.mouse.move_to_element(element).perform()
+            self.with_element(locator, lambda element: self.mouse.move_to_element(element).perform())
             return True
         except NoSuchElementException:
             return False
+        finally:
+            self.clear_element_cache()
 
     @property
     def page_title(self):
@@ -111,15 +344,12 @@ class Page(object):
         Return true if the element at the specified locator is present in the DOM.
         Note: It returns false immediately if the element is not found.
         """
-        self.selenium.implicitly_wait(0)
-        try:
-            self.find_element(locator)
-            return True
-        except NoSuchElementException:
-            return False
-        finally:
-            # set the implicit wait back
-            self.selenium.implicitly_wait(self.testsetup.default_implicit_wait)
+        with self.zero_implicit_wait():
+            try:
+                self._cache_element(locator, self._find_element(locator))
+                return True
+            except NoSuchElementException:
+                return False
 
     def is_element_visible(self, locator):
         """
@@ -127,7 +357,7 @@ class Page(object):
         Note: It uses an implicit wait if it cannot find the element immediately.
         """
         try:
-            return self.find_element(locator).is_displayed()
+            return self.with_element(locator, lambda element: element.is_displayed())
         except (NoSuchElementException, ElementNotVisibleException):
             return False
 
@@ -136,104 +366,348 @@ class Page(object):
         Return true if the element at the specified locator is not visible in the browser.
         Note: It returns true immediately if the element is not found.
         """
-        self.selenium.implicitly_wait(0)
-        try:
-            return not self.selenium.find_element(locator).is_displayed()
-        except (NoSuchElementException, ElementNotVisibleException):
-            return True
-        finally:
-            # set the implicit wait back
-            self.selenium.implicitly_wait(self.testsetup.default_implicit_wait)
+        with self.zero_implicit_wait():
+            try:
+                return not self._find_element(locator).is_displayed()
+            except (NoSuchElementException, ElementNotVisibleException):
+                return True
 
     def is_text_visible(self, text, locator):
         """Return true if the text at the specified locator is visible in the browser."""
         self.is_element_present(locator)
-        page_text = self.find_element(locator).text
+        page_text = self.with_element(locator, lambda element: element.text)
         Assert.equal(page_text, text, "Cannot find text '%s' on the page." % text)
         return True
 
     def is_text_not_visible(self, text, locator):
         """Return true the text at the specified locator is not visible in the browser."""
         self.is_element_present(locator)
-        page_text = self.find_element(locator).text
+        page_text = self.with_element(locator, lambda element: element.text)
         Assert.not_equal(page_text, text, "Found text '%s' on the page." % text)
         return True
 
     def are_link_destinations_correct(self, link_list):
         """Return true if the expected links exist on a page."""
+        link_list = [link for link in link_list if link.get('url_suffix') is not None]
+        urls = self.get_attributes([(link.get('locator'), 'href') for link in link_list])
         bad_links = []
-        for link in link_list:
-            if link.get('url_suffix') is not None:
-                url = self.link_destination(link.get('locator'))
-                if not url.endswith(link.get('url_suffix')):
-                    bad_links.append('%s does not end with %s' % (url, link.get('url_suffix')))
+        for link, url in zip(link_list, urls):
+            if not url.endswith(link.get('url_suffix')):
+                bad_links.append('%s does not end with %s' % (url, link.get('url_suffix')))
         Assert.equal(0, len(bad_links), '%s bad links found: ' % len(bad_links) + ', '.join(bad_links))
         return True
 
+    def wait_until(self, condition, message):
+        """
+        Call condition until it returns something true, and return that.
+        Polling starts at _poll_interval and backs off, and a TimeoutException with the message is raised
+        once self.timeout seconds have passed on the wall clock.
+        """
+        end_time = time.time() + self.timeout
+        interval = self._poll_interval
+        while True:
+            value = condition()
+            if value:
+                return value
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                raise TimeoutException(message)
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, self._max_poll_interval)
+
+    def _wait_in_browser(self, locator, state):
+        """
+        Wait inside the page for the element at the locator to reach the state.
+        Return True or False for whether it did, or None when the browser cannot do the wait.
+        """
+        if self._navigation.get('async_unsupported') or locator[0] not in scripts.SUPPORTED_STRATEGIES:
+            return None
+        root = getattr(self, '_root_element', None)
+        try:
+            # the script timeout outlasts the wait; it is set once for each session
+            script_timeout = self.timeout + 5
+            if self._navigation.get('script_timeout') != script_timeout:
+                self.selenium.set_script_timeout(script_timeout)
+                self._navigation['script_timeout'] = script_timeout
+            return self.selenium.execute_async_script(scripts.WAIT_FOR_STATE, root, locator[0], locator[1],
+                                                      state, self.timeout * 1000)
+        except WebDriverException as error:
+            # a stale root, a bad locator or a page that navigated away only sends this wait back to
+            # polling, which reports the error the way it always has
+            message = str(getattr(error, 'msg', None) or error).lower()
+            if type(error).__name__ == 'UnknownMethodException' or \
+                    any(words in message for words in UNSUPPORTED_SCRIPT_MESSAGES):
+                # every later page object of the session polls instead of trying again
+                self._navigation['async_unsupported'] = True
+            return None
+
+    def _is_displayed_now(self, locator):
+        """Return true if the element at the locator is visible, without waiting for it to appear."""
+        with self.zero_implicit_wait():
+            try:
+                elements = self.find_elements(locator)
+                return len(elements) > 0 and elements[0].is_displayed()
+            except StaleElementReferenceException:
+                return False
+
+    def _wait_for_state(self, locator, state, condition, message):
+        met = self._wait_in_browser(locator, state)
+        if met is None:
+            return self.wait_until(condition, message)
+        if not met:
+            raise TimeoutException(message)
+        return True
+
     def wait_for_element_present(self, locator):
         """Wait for the element at the specified locator to be present in the DOM."""
-        count = 0
-        while not self.is_element_present(locator):
-            time.sleep(1)
-            count += 1
-            if count == self.timeout:
-                raise Exception(str(locator) + ' has not loaded')
+        self._wait_for_state(locator, 'present', lambda: self.is_element_present(locator),
+                             str(locator) + ' has not loaded')
 
     def wait_for_element_visible(self, locator):
         """Wait for the element at the specified locator to be visible in the browser."""
-        count = 0
-        while not self.is_element_visible(locator):
-            time.sleep(1)
-            count += 1
-            if count == self.timeout:
-                raise Exception(str(locator) + " is not visible")
+        self._wait_for_state(locator, 'visible', lambda: self._is_displayed_now(locator),
+                             str(locator) + ' is not visible')
 
     def wait_for_element_not_present(self, locator):
         """Wait for the element at the specified locator to be not present in the DOM."""
-        self.selenium.implicitly_wait(0)
         try:
-            WebDriverWait(self.selenium, self.timeout).until(lambda s: len(self.find_elements(locator)) < 1)
-            return True
+            return self._wait_for_state(locator, 'not present', lambda: not self.is_element_present(locator),
+                                        str(locator) + ' is still present')
         except TimeoutException:
             Assert.fail(TimeoutException)
-        finally:
-            self.selenium.implicitly_wait(self.testsetup.default_implicit_wait)
 
     def wait_for_element_not_visible(self, locator):
         """Wait for the element at the specified locator to be visible in the browser."""
-        count = 0
-        while self.is_element_visible(locator):
-            time.sleep(1)
-            count += 1
-            if count == self.timeout:
-                raise Exception(str(locator) + " is visible")
+        self._wait_for_state(locator, 'not visible', lambda: not self._is_displayed_now(locator),
+                             str(locator) + ' is visible')
 
     def get_url_current_page(self):
         """Return the url for the current page."""
         return(self.selenium.current_url)
 
+    @property
+    def _implicit_wait(self):
+        return Page._implicit_wait_state.setdefault(self._session_key, {'seconds': None, 'zero_depth': 0})
+
+    def _apply_implicit_wait(self):
+        """
+        Give the browser the implicit wait the current block wants, unless it already has it.
+        Return true if the browser had to be told.
+        """
+        state = self._implicit_wait
+        wanted = 0 if state['zero_depth'] else self.testsetup.default_implicit_wait
+        if state['seconds'] == wanted:
+            return False
+        if state['seconds'] == 0 and wanted:
+            # the restore that the last zero_implicit_wait() block put off
+            Page.saved_driver_commands -= 1
+        self.selenium.implicitly_wait(wanted)
+        state['seconds'] = wanted
+        return True
+
+    def _restore_implicit_wait_lazily(self):
+        """
+        Make the driver give back the default implicit wait before any element lookup outside a
+        zero_implicit_wait() block, including lookups made on the driver or its elements directly.
+        This is what lets the blocks leave the wait off when they exit.
+        """
+        state = self._implicit_wait
+        state['default'] = self.testsetup.default_implicit_wait
+        selenium = self.selenium
+        if selenium is None or getattr(selenium, '_restores_implicit_wait', False):
+            return
+        execute = selenium.execute
+
+        def restoring_execute(driver_command, params=None):
+            if driver_command in LOOKUP_COMMANDS and not state['zero_depth'] and state['seconds'] == 0 \
+                    and state['default']:
+                Page.saved_driver_commands -= 1
+                state['seconds'] = state['default']
+                selenium.implicitly_wait(state['default'])
+            return execute(driver_command, params)
+
+        selenium.execute = restoring_execute
+        selenium._restores_implicit_wait = True
+
+    @contextmanager
+    def zero_implicit_wait(self):
+        """
+        Turn the implicit wait off for a block of presence checks.
+        The browser is told once however many checks, nested blocks or back-to-back blocks run: the
+        default wait is only restored before the next lookup that uses it.
+        """
+        state = self._implicit_wait
+        state['zero_depth'] += 1
+        # against turning the wait off and back on for every block
+        Page.saved_driver_commands += 2
+        try:
+            if self._apply_implicit_wait():
+                Page.saved_driver_commands -= 1
+            yield
+        finally:
+            state['zero_depth'] -= 1
+
     def find_element(self, locator):
-        """Return the element at the specified locator."""
+        """
+        Return the element at the specified locator, from the element cache when it is on. Cached
+        elements are reused until a page object method changes the page; call clear_element_cache()
+        after changing it through the driver directly.
+        """
+        if not self._cache_elements:
+            return self._find_element(locator)
+        key = (id(self._selenium_root), locator[0], locator[1])
+        element = self._element_cache.pop(key, None)
+        if element is None:
+            self.element_cache_misses += 1
+            element = self._find_element(locator)
+        else:
+            self.element_cache_hits += 1
+        self._cache_element(locator, element)
+        return element
+
+    def _find_element(self, locator):
+        self._apply_implicit_wait()
         return self._selenium_root.find_element(*locator)
 
+    def _cache_element(self, locator, element):
+        if self._cache_elements:
+            self._element_cache[(id(self._selenium_root), locator[0], locator[1])] = element
+            while len(self._element_cache) > self._element_cache_size:
+                self._element_cache.popitem(last=False)
+
+    def clear_element_cache(self):
+        """Forget all cached element handles."""
+        self._element_cache.clear()
+
+    def with_element(self, locator, action):
+        """
+        Return the result of calling action with the element at the specified locator.
+        If a cached element has gone stale, it is found again and the action is retried once.
+        """
+        try:
+            return action(self.find_element(locator))
+        except StaleElementReferenceException:
+            if not self._cache_elements:
+                raise
+            self.clear_element_cache()
+            return action(self.find_element(locator))
+
     def find_elements(self, locator):
         """Return a list of elements at the specified locator."""
+        self._apply_implicit_wait()
         return self._selenium_root.find_elements(*locator)
 
+    def get_attributes(self, attribute_list):
+        """
+        Return the values for a list of (locator, attribute name) pairs, read with a single script call.
+        Elements that are not on the page yet are looked up one at a time, using the implicit wait.
+        """
+        if not attribute_list:
+            return []
+        items = [[locator[0], locator[1], name] for locator, name in attribute_list]
+        results = self._read_script(scripts.READ_ATTRIBUTES, getattr(self, '_root_element', None), items)
+        values = []
+        for (locator, name), (found, value) in zip(attribute_list, results):
+            if not found:
+                value = self.with_element(locator, lambda element: element.get_attribute(name))
+            values.append(value)
+        return values
+
     def link_destination(self, locator):
         """Return the href attribute of the element at the specified locator."""
-        link = self.find_element(locator)
-        return link.get_attribute('href')
+        return self.get_attributes([(locator, 'href')])[0]
+
+    def link_destinations(self, locators):
+        """Return the href attributes of the elements at the specified locators."""
+        return self.get_attributes([(locator, 'href') for locator in locators])
 
     def image_source(self, locator):
         """Return the src attribute of the element at the specified locator."""
-        link = self.find_element(locator)
-        return link.get_attribute('src')
+        return self.get_attributes([(locator, 'src')])[0]
+
+    def image_sources(self, locators):
+        """Return the src attributes of the elements at the specified locators."""
+        return self.get_attributes([(locator, 'src') for locator in locators])
+
+    def audit_images(self, locator=('tag name', 'img'), **limits):
+        """
+        Return an ImageReport for every image at the locator (all images by default), with the format,
+        dimensions and size read from the first few KB of each file, the size it is rendered at, and the
+        problems found by images.problems(), which takes the limits as keyword arguments. The rendered
+        sizes of all of the images are read with a single script call.
+        """
+        pixel_ratio, rendered = self._read_script(scripts.READ_IMAGES, getattr(self, '_root_element', None),
+                                                    locator[0], locator[1])
+        headers = images.fetch_headers([src for src, width, height in rendered
+                                        if src and not src.startswith('data:')], self.timeout)
+        reports = []
+        for src, width, height in rendered:
+            header, size = headers.get(src, (None, None))
+            reports.append(images.ImageReport(
+                src, header and header.format, header and header.width, header and header.height, size,
+                width, height, images.problems(header, size, width, height, pixel_ratio, **limits)))
+        return reports
+
+    def screenshot(self, locator=None):
+        """
+        Return a screenshot as an array of RGB pixels: of the window, or of the element at the locator,
+        cropped from a screenshot of the window. Without a locator, a page region is a screenshot of itself.
+        """
+        root = getattr(self, '_root_element', None)
+        if locator is None and root is None:
+            return visual.decode(self.selenium.get_screenshot_as_png())
+        if locator is None:
+            clip = self._read_script(scripts.READ_CLIP, root, None, None)
+        else:
+            clip = self._run_on_element(locator, scripts.READ_CLIP)
+        left, top, width, height, ratio, scroll_x, scroll_y, viewport_height = clip
+        pixels = visual.decode(self.selenium.get_screenshot_as_png())
+        if pixels.shape[0] > (viewport_height + 1) * ratio:
+            # some drivers take a screenshot of the whole document rather than of the viewport
+            left, top = left + scroll_x, top + scroll_y
+        left, top = max(int(round(left * ratio)), 0), max(int(round(top * ratio)), 0)
+        return pixels[top:top + int(round(height * ratio)), left:left + int(round(width * ratio))]
+
+    def check_visual(self, name, locator=None):
+        """
+        Compare a screenshot of the window, or of the element at the locator, with its baseline in the
+        store given with --visual-baselines, and return a visual.VisualDiff. The window width is part of
+        the snapshot's name, so the same name can be checked at every breakpoint.
+        """
+        if visual.baselines is None:
+            raise ValueError('Visual snapshots need a baseline directory, given with --visual-baselines.')
+        name = '%s@%spx' % (name, self.selenium.get_window_size()['width'])
+        return visual.baselines.compare(name, self.screenshot(locator))
 
 
 class PageRegion(Page):
     """Base class for a page region (generally an element in a list of elements)."""
 
+    # Fields read by snapshots(), as (name, kind, locator) or (name, 'attribute', locator, attribute name)
+    # tuples, where kind is 'text', 'attribute' or 'present'. Locators are relative to the region.
+    _snapshot_fields = []
+
     def __init__(self, testsetup, element):
         self._root_element = element
         Page.__init__(self, testsetup)
+
+    @classmethod
+    def snapshot_type(cls):
+        """Return the immutable record type that snapshots() returns for this region."""
+        if '_snapshot_type' not in cls.__dict__:
+            cls._snapshot_type = namedtuple(cls.__name__ + 'Snapshot', [field[0] for field in cls._snapshot_fields])
+        return cls._snapshot_type
+
+    @classmethod
+    def snapshots(cls, page, locator):
+        """
+        Return a record of the _snapshot_fields of every region at the locator on the page.
+        All regions are read with a single script call, so use this instead of the region
+        properties when asserting over many regions.
+        """
+        fields = [[field[1], field[2][0], field[2][1], len(field) > 3 and field[3] or None]
+                  for field in cls._snapshot_fields]
+        rows = page._read_script(scripts.READ_FIELDS, getattr(page, '_root_element', None),
+                                 locator[0], locator[1], fields)
+        record = cls.snapshot_type()
+        return [record(*row) for row in rows]
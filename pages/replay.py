@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Records the WebDriver commands of a test and their responses, and replays them without a browser.
+Commands are recorded as the command executor sends and receives them, so a replayed response goes
+through the same error handling and element wrapping as the live one did.
+"""
+
+import gzip
+import json
+import os
+import re
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# Commands that start and end a session, which are not part of what a test does
+SESSION_COMMANDS = ('newSession', 'quit')
+
+
+def recording_path(directory, test):
+    """Return the file the recording of the test is kept in."""
+    return os.path.join(directory, re.sub(r'[^\w.-]+', '_', test) + '.json.gz')
+
+
+def _normalize(params):
+    """Return the params as they would read back from a recording, without the session they were sent in."""
+    params = json.loads(json.dumps(params or {}))
+    params.pop('sessionId', None)
+    return params
+
+
+def _describe(params):
+    """Return the params as json, with long strings such as scripts cut short."""
+    def shorten(value):
+        if isinstance(value, dict):
+            return dict((key, shorten(item)) for key, item in value.items())
+        if isinstance(value, list):
+            return [shorten(item) for item in value]
+        if isinstance(value, type(u'')) and len(value) > 60:
+            return value.strip()[:57] + '...'
+        return value
+    return json.dumps(shorten(params), sort_keys=True)
+
+
+class ReplayMismatchError(WebDriverException):
+    """The test sent a different command than the one that was recorded at that point."""
+
+
+class Recorder(object):
+    """Records the commands sent through a driver's command executor, and their responses."""
+
+    def __init__(self):
+        self.commands = []
+
+    def instrument(self, selenium):
+        """Record the commands the driver sends from now on, and return the driver."""
+        executor = selenium.command_executor
+        if getattr(executor, '_driver_recorder', None) is self:
+            return selenium
+        execute = getattr(executor, '_unrecorded_execute', executor.execute)
+        recorder = self
+
+        def recorded_execute(command, params):
+            response = execute(command, params)
+            if command not in SESSION_COMMANDS:
+                recorder.commands.append([command, _normalize(params), json.loads(json.dumps(response))])
+            return response
+
+        executor.execute = recorded_execute
+        executor._unrecorded_execute = execute
+        executor._driver_recorder = self
+        return selenium
+
+    def save(self, path, test, implicit_wait):
+        with gzip.open(path, 'wb') as f:
+            f.write(json.dumps({'test': test, 'implicit_wait': implicit_wait, 'commands': self.commands},
+                               separators=(',', ':')).encode('utf-8'))
+
+
+class ReplayExecutor(object):
+    """A command executor that answers each command with the response recorded for it."""
+
+    def __init__(self, path):
+        with gzip.open(path, 'rb') as f:
+            recording = json.loads(f.read().decode('utf-8'))
+        self.path = path
+        self.test = recording['test']
+        self.implicit_wait = recording['implicit_wait']
+        self.commands = recording['commands']
+        self.position = 0
+
+    def execute(self, command, params):
+        if command == 'newSession':
+            return {'status': 0, 'sessionId': 'replay', 'value': {'sessionId': 'replay', 'capabilities': {}}}
+        if command == 'quit':
+            return {'status': 0, 'value': None}
+        params = _normalize(params)
+        if self.position >= len(self.commands):
+            raise ReplayMismatchError('Command %s of %s was %s %s, but the recording in %s ends after %s commands.' % (
+                self.position + 1, self.test, command, _describe(params), self.path, len(self.commands)))
+        expected_command, expected_params, response = self.commands[self.position]
+        if command != expected_command or params != expected_params:
+            raise ReplayMismatchError('Command %s of %s was %s %s, but the recording in %s has %s %s.' % (
+                self.position + 1, self.test, command, _describe(params), self.path,
+                expected_command, _describe(expected_params)))
+        self.position += 1
+        return json.loads(json.dumps(response))
+
+    def unplayed(self):
+        """Return the number of recorded commands that have not been replayed."""
+        return len(self.commands) - self.position
+
+
+class ReplayDriver(WebDriver):
+    """
+    A driver that replays a recording: each command must be the one that was recorded next, and gets
+    the recorded response. No browser or network is used. Tests that depend on the wall clock, such as
+    a wait that timed out, replay only as long as they send the same commands.
+    """
+
+    def __init__(self, path):
+        executor = ReplayExecutor(path)
+        try:
+            WebDriver.__init__(self, command_executor=executor, desired_capabilities={})
+        except TypeError:
+            # selenium 4 takes options instead of desired capabilities
+            from selenium.webdriver.common.options import ArgOptions
+            WebDriver.__init__(self, command_executor=executor, options=ArgOptions())
+        # a session id of its own keeps Page from mistaking it for a browser it has seen before
+        self.session_id = 'replay-%s' % id(self)
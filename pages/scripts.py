@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""JavaScript run in the browser by the Page helpers that need a single round trip."""
+
+# Every locator strategy from selenium.webdriver.common.by.By can be resolved in the browser
+SUPPORTED_STRATEGIES = ('id', 'xpath', 'link text', 'partial link text', 'name', 'tag name',
+                        'class name', 'css selector')
+
+# Defines findAll(root, by, value), which returns an array of the elements matching a locator
+# tuple below root (an element, or the document when root is null), and attributeOf, textOf and
+# isDisplayed, which read an element the way WebElement.get_attribute, text and is_displayed do
+FIND_ALL = """
+function findAll(root, by, value) {
+    root = root || document;
+    var quote = function(s) { return '"' + String(s).replace(/["\\\\]/g, '\\\\$&') + '"'; };
+    var list = function(nodes) { return Array.prototype.slice.call(nodes); };
+    var links = function(match) {
+        return list(root.getElementsByTagName('a')).filter(function(a) {
+            return match((a.textContent || '').replace(/\\s+/g, ' ').trim());
+        });
+    };
+    switch (by) {
+        case 'id': return list(root.querySelectorAll('[id=' + quote(value) + ']'));
+        case 'name': return list(root.querySelectorAll('[name=' + quote(value) + ']'));
+        case 'css selector': return list(root.querySelectorAll(value));
+        case 'tag name': return list(root.getElementsByTagName(value));
+        case 'class name': return list(root.getElementsByClassName(value));
+        case 'link text': return links(function(text) { return text === value; });
+        case 'partial link text': return links(function(text) { return text.indexOf(value) !== -1; });
+        case 'xpath':
+            var result = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var nodes = [];
+            for (var i = 0; i < result.snapshotLength; i++) {
+                nodes.push(result.snapshotItem(i));
+            }
+            return nodes;
+    }
+    throw new Error('Unsupported locator strategy: ' + by);
+}
+
+function attributeOf(element, name) {
+    var property = element[name];
+    if (property !== undefined && property !== null && typeof property !== 'object' && typeof property !== 'function') {
+        return property;
+    }
+    return element.getAttribute(name);
+}
+
+function textOf(element) {
+    return (element.innerText || element.textContent || '').replace(/^\\s+|\\s+$/g, '');
+}
+
+function isDisplayed(element) {
+    if (!element || !element.ownerDocument) {
+        return false;
+    }
+    for (var node = element; node && node.nodeType === 1; node = node.parentNode) {
+        var style = window.getComputedStyle(node);
+        if (style.display === 'none' || (node === element && style.visibility === 'hidden')) {
+            return false;
+        }
+    }
+    return element.getClientRects().length > 0;
+}
+"""
+
+# Puts a loaded page back the way it was: empty storage, scrolled to the top
+RESET_PAGE_STATE = """
+try {
+    window.localStorage.clear();
+    window.sessionStorage.clear();
+} catch (e) {
+    // storage is not available for every origin
+}
+window.scrollTo(0, 0);
+"""
+
+# Waits inside the page for a locator to reach a state ('present', 'not present', 'visible' or
+# 'not visible'). A MutationObserver re-checks on every DOM change and a short interval covers
+# changes that do not touch the DOM, such as :hover styles.
+# Arguments: root, by, value, state, timeout in ms, callback. Calls back with true or false.
+WAIT_FOR_STATE = FIND_ALL + """
+var root = arguments[0], by = arguments[1], value = arguments[2], state = arguments[3],
+    timeout = arguments[4], done = arguments[arguments.length - 1];
+var check = function() {
+    var elements = findAll(root, by, value);
+    switch (state) {
+        case 'present': return elements.length > 0;
+        case 'not present': return elements.length === 0;
+        case 'visible': return elements.length > 0 && isDisplayed(elements[0]);
+        case 'not visible': return elements.length === 0 || !isDisplayed(elements[0]);
+    }
+};
+var observer, interval, timer, finished = false;
+var finish = function(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    clearInterval(interval);
+    clearTimeout(timer);
+    done(result);
+};
+if (check()) {
+    finish(true);
+} else {
+    observer = new MutationObserver(function() { if (check()) { finish(true); } });
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    interval = setInterval(function() { if (check()) { finish(true); } }, 50);
+    timer = setTimeout(function() { finish(false); }, timeout);
+}
+"""
+
+# Reads fields from every element matching a locator.
+# Arguments: root, by, value, fields, where each field is [kind, by, value, attribute name] and
+# kind is 'text', 'attribute' or 'present'. Returns one array of field values per element.
+READ_FIELDS = FIND_ALL + """
+var root = arguments[0], by = arguments[1], value = arguments[2], fields = arguments[3];
+return findAll(root, by, value).map(function(element) {
+    return fields.map(function(field) {
+        var match = findAll(element, field[1], field[2])[0];
+        switch (field[0]) {
+            case 'present': return match !== undefined;
+            case 'text': return match === undefined ? null : textOf(match);
+            case 'attribute': return match === undefined ? null : attributeOf(match, field[3]);
+        }
+    });
+});
+"""
+
+# Reads attributes of the first element matching each locator.
+# Arguments: root, items, where each item is [by, value, attribute name].
+# Returns [found, value] for each item.
+READ_ATTRIBUTES = FIND_ALL + """
+var root = arguments[0], items = arguments[1];
+return items.map(function(item) {
+    var element = findAll(root, item[0], item[1])[0];
+    return element === undefined ? [false, null] : [true, attributeOf(element, item[2])];
+});
+"""
+
+# Selects an option of the first select element matching a locator and fires the input and change
+# events that a user's selection would.
+# Arguments: root, by, value, match ('value', 'text' or 'index'), target.
+# Returns null when there is no select element, otherwise whether the option was found.
+SELECT_OPTION = FIND_ALL + """
+var root = arguments[0], by = arguments[1], value = arguments[2], match = arguments[3], target = arguments[4];
+var select = findAll(root, by, value)[0];
+if (select === undefined) {
+    return null;
+}
+var options = select.options, option;
+if (match === 'index') {
+    option = options[target];
+} else {
+    for (var i = 0; i < options.length && option === undefined; i++) {
+        var candidate = match === 'value' ? options[i].value : textOf(options[i]);
+        if (candidate === target) {
+            option = options[i];
+        }
+    }
+}
+if (option === undefined) {
+    return false;
+}
+if (!option.selected) {
+    option.selected = true;
+    ['input', 'change'].forEach(function(type) {
+        var event = document.createEvent('HTMLEvents');
+        event.initEvent(type, true, false);
+        select.dispatchEvent(event);
+    });
+}
+return true;
+"""
+
+# Reads every option of the first select element matching a locator.
+# Arguments: root, by, value. Returns null when there is no select element, otherwise
+# [value, text] for each option.
+READ_OPTIONS = FIND_ALL + """
+var select = findAll(arguments[0], arguments[1], arguments[2])[0];
+if (select === undefined) {
+    return null;
+}
+return Array.prototype.map.call(select.options, function(option) {
+    return [option.value, textOf(option)];
+});
+"""
+
+# Reads whether the first element matching each locator is displayed.
+# Arguments: root, locators, where each locator is [by, value].
+# Returns null for a locator that matches nothing, otherwise true or false.
+READ_VISIBILITY = FIND_ALL + """
+var root = arguments[0], locators = arguments[1];
+return locators.map(function(locator) {
+    var element = findAll(root, locator[0], locator[1])[0];
+    return element === undefined ? null : isDisplayed(element);
+});
+"""
+
+# Reads the width of the viewport, which is what width media queries are evaluated against.
+READ_VIEWPORT_WIDTH = """
+return window.innerWidth;
+"""
+
+# Reads the media queries of every stylesheet on the page, including those of nested @media and
+# @import rules. Stylesheets from another origin cannot be read from the page, so their urls are
+# returned to be fetched instead. Returns [queries, urls].
+READ_MEDIA_QUERIES = """
+var queries = [], urls = [];
+var readSheet = function(sheet) {
+    if (sheet.media && sheet.media.mediaText) {
+        queries.push(sheet.media.mediaText);
+    }
+    var rules;
+    try {
+        rules = sheet.cssRules;
+    } catch (e) {
+        if (sheet.href) {
+            urls.push(sheet.href);
+        }
+        return;
+    }
+    readRules(rules);
+};
+var readRules = function(rules) {
+    for (var i = 0; rules && i < rules.length; i++) {
+        var rule = rules[i];
+        if (rule.styleSheet) {
+            readSheet(rule.styleSheet);
+        } else if (rule.media && rule.media.mediaText) {
+            queries.push(rule.media.mediaText);
+        }
+        if (rule.cssRules) {
+            readRules(rule.cssRules);
+        }
+    }
+};
+for (var i = 0; i < document.styleSheets.length; i++) {
+    readSheet(document.styleSheets[i]);
+}
+return [queries, urls];
+"""
+
+# Reads the Navigation Timing, Paint Timing and Resource Timing entries of the loaded page. Times are
+# in milliseconds from the start of the navigation. Returns null when the browser has no Performance
+# API, 'loading' when the load event has not ended yet, and otherwise [navigation, paints, resources],
+# where navigation is [ttfb, DOMContentLoaded, load, transfer size], each paint is [name, start] and
+# each resource is [url, initiator type, transfer size, encoded body size, duration]. Sizes are 0 when
+# the browser does not expose them.
+READ_PAGE_TIMING = """
+var performance = window.performance;
+if (!performance) {
+    return null;
+}
+var navigation, entries = performance.getEntriesByType ? performance.getEntriesByType('navigation') : [];
+if (entries.length) {
+    var entry = entries[0];
+    if (!entry.loadEventEnd) {
+        return 'loading';
+    }
+    navigation = [entry.responseStart, entry.domContentLoadedEventEnd, entry.loadEventEnd, entry.transferSize || 0];
+} else if (performance.timing) {
+    var timing = performance.timing, start = timing.navigationStart;
+    if (!timing.loadEventEnd) {
+        return 'loading';
+    }
+    navigation = [timing.responseStart - start, timing.domContentLoadedEventEnd - start,
+                  timing.loadEventEnd - start, 0];
+} else {
+    return null;
+}
+var paints = performance.getEntriesByType ? performance.getEntriesByType('paint').map(function(paint) {
+    return [paint.name, paint.startTime];
+}) : [];
+var resources = performance.getEntriesByType ? performance.getEntriesByType('resource').map(function(resource) {
+    return [resource.name, resource.initiatorType, resource.transferSize || 0,
+            resource.encodedBodySize || 0, resource.duration];
+}) : [];
+return [navigation, paints, resources];
+"""
+
+# Reads the source and rendered size of every image element matching a locator.
+# Arguments: root, by, value. Returns [device pixel ratio, images], where each image is
+# [source, rendered width, rendered height]. Images that are not displayed have a size of 0.
+READ_IMAGES = FIND_ALL + """
+var images = findAll(arguments[0], arguments[1], arguments[2]).map(function(image) {
+    var displayed = isDisplayed(image), rect = image.getBoundingClientRect();
+    return [image.currentSrc || image.src, displayed ? Math.round(rect.width) : 0,
+            displayed ? Math.round(rect.height) : 0];
+});
+return [window.devicePixelRatio || 1, images];
+"""
+
+# Scrolls an element into view and reads where it is in the viewport, to crop it from a screenshot.
+# Arguments: root, by, value; without a by, the root itself. Returns [left, top, width, height,
+# device pixel ratio, horizontal scroll, vertical scroll, viewport height], or null when nothing
+# matches. The box is in css pixels, relative to the viewport.
+READ_CLIP = FIND_ALL + """
+var element = arguments[1] ? findAll(arguments[0], arguments[1], arguments[2])[0] : arguments[0];
+if (!element) {
+    return null;
+}
+element.scrollIntoView();
+var rect = element.getBoundingClientRect();
+return [rect.left, rect.top, rect.width, rect.height, window.devicePixelRatio || 1,
+        window.pageXOffset, window.pageYOffset, window.innerHeight];
+"""
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import itertools
+import re
+try:
+    from urlparse import urljoin
+except ImportError:
+    from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webelement import WebElement
+
+import scripts
+
+try:
+    import lxml
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+
+class StaticBackendError(WebDriverException):
+    """Raised when a test on the static backend does something that needs a browser."""
+
+    def __init__(self, what):
+        WebDriverException.__init__(self, '%s needs a browser, which the static backend does not have. '
+                                          'Remove the static marker from the test.' % what)
+
+
+class StaticElement(WebElement):
+    """A WebElement for an element of the page parsed by a StaticDriver."""
+
+    _ids = itertools.count()
+
+    def __init__(self, parent, tag):
+        WebElement.__init__(self, parent, 'static-%s' % next(self._ids))
+        self.tag = tag
+
+    def _execute(self, command, params=None):
+        params = dict(params or {}, element=self)
+        return self._parent.execute(command, params)['value']
+
+    def find_element(self, by, value):
+        return self._execute('findChildElement', {'using': by, 'value': value})
+
+    def find_elements(self, by, value):
+        return self._execute('findChildElements', {'using': by, 'value': value})
+
+    def find_elements_by_tag_name(self, name):
+        return self.find_elements('tag name', name)
+
+    @property
+    def text(self):
+        return self._execute('getElementText')
+
+    def get_attribute(self, name):
+        return self._execute('getElementAttribute', {'name': name})
+
+    def is_displayed(self):
+        return self._execute('isElementDisplayed')
+
+    def click(self):
+        self._execute('clickElement')
+
+    def clear(self):
+        self._execute('clearElement')
+
+    def send_keys(self, *value):
+        self._execute('sendKeysToElement', {'text': ''.join(value)})
+
+
+class StaticDriver(object):
+    """
+    A WebDriver that answers the commands page objects send for reading a page from its server-rendered
+    html, parsed once, without a browser. Every command goes through execute(), like it does for a real
+    driver. The scripts from pages.scripts that only read the page are answered in Python; anything that
+    needs a browser (clicks, typing, hovering, resizing, other scripts) raises StaticBackendError.
+    Visibility only takes inline styles and hidden attributes into account, not stylesheets.
+    """
+
+    session_id = 'static'
+
+    def __init__(self):
+        self.soup = None
+        self.url = None
+        self.window_size = {'width': 1024, 'height': 768}
+        self._elements = {}
+        self._id_index = None
+        self._script_handlers = {
+            scripts.READ_FIELDS: self._read_fields,
+            scripts.READ_ATTRIBUTES: self._read_attributes,
+            scripts.READ_OPTIONS: self._read_options,
+            scripts.READ_VISIBILITY: self._read_visibility,
+            # there are no browser borders, so the viewport is as wide as the window
+            scripts.READ_VIEWPORT_WIDTH: lambda: self.window_size['width'],
+            scripts.RESET_PAGE_STATE: lambda: None,
+            scripts.WAIT_FOR_STATE: self._wait_for_state,
+            # there is no browser to time the page load in
+            scripts.READ_PAGE_TIMING: lambda: None,
+        }
+
+    # Commands that only configure a browser, which have nothing to do here
+    _ignored_commands = ('implicitlyWait', 'setTimeouts', 'setScriptTimeout', 'quit')
+
+    def execute(self, driver_command, params=None):
+        if driver_command in self._ignored_commands:
+            return {'value': None}
+        handler = getattr(self, '_command_' + driver_command, None)
+        if handler is None:
+            raise StaticBackendError(driver_command)
+        return {'value': handler(**(params or {}))}
+
+    # The WebDriver api used by the page objects
+
+    def get(self, url):
+        self.execute('get', {'url': url})
+
+    @property
+    def title(self):
+        return self.execute('getTitle')['value']
+
+    @property
+    def current_url(self):
+        return self.execute('getCurrentUrl')['value']
+
+    @property
+    def page_source(self):
+        return self.execute('getPageSource')['value']
+
+    def find_element(self, by, value):
+        return self.execute('findElement', {'using': by, 'value': value})['value']
+
+    def find_elements(self, by, value):
+        return self.execute('findElements', {'using': by, 'value': value})['value']
+
+    def implicitly_wait(self, seconds):
+        self.execute('implicitlyWait', {'ms': seconds * 1000})
+
+    def set_script_timeout(self, seconds):
+        self.execute('setScriptTimeout', {'ms': seconds * 1000})
+
+    def execute_script(self, script, *args):
+        return self.execute('executeScript', {'script': script, 'args': list(args)})['value']
+
+    def execute_async_script(self, script, *args):
+        return self.execute('executeAsyncScript', {'script': script, 'args': list(args)})['value']
+
+    def set_window_size(self, width, height, windowHandle='current'):
+        self.execute('setWindowSize', {'width': width, 'height': height})
+
+    def get_window_size(self, windowHandle='current'):
+        return self.execute('getWindowSize')['value']
+
+    def maximize_window(self):
+        self.execute('setWindowSize', {'width': 1920, 'height': 1080})
+
+    def quit(self):
+        self.execute('quit')
+
+    # Command handlers
+
+    def _command_get(self, url):
+        response = requests.get(url)
+        self.url = response.url
+        self.soup = BeautifulSoup(response.content, PARSER)
+        self._elements = {}
+        self._id_index = None
+
+    def _command_getTitle(self):
+        return self.soup.title.get_text() if self.soup.title is not None else ''
+
+    def _command_getCurrentUrl(self):
+        return self.url
+
+    def _command_getPageSource(self):
+        return str(self.soup)
+
+    def _command_findElement(self, using, value, element=None):
+        tags = self._find_all(element.tag if element else None, using, value)
+        if not tags:
+            raise NoSuchElementException('Unable to locate element: %s=%s' % (using, value))
+        return self._element(tags[0])
+
+    def _command_findElements(self, using, value, element=None):
+        return [self._element(tag) for tag in self._find_all(element.tag if element else None, using, value)]
+
+    _command_findChildElement = _command_findElement
+    _command_findChildElements = _command_findElements
+
+    def _command_getElementText(self, element):
+        return self._text(element.tag)
+
+    def _command_getElementAttribute(self, element, name):
+        return self._attribute(element.tag, name)
+
+    def _command_isElementDisplayed(self, element):
+        return self._is_displayed(element.tag)
+
+    def _command_executeScript(self, script, args):
+        handler = self._script_handlers.get(script)
+        if handler is None:
+            raise StaticBackendError('executeScript')
+        return handler(*[arg.tag if isinstance(arg, StaticElement) else arg for arg in args])
+
+    _command_executeAsyncScript = _command_executeScript
+
+    def _command_getWindowSize(self):
+        return dict(self.window_size)
+
+    # The page scripts, answered from the parsed page
+
+    def _read_fields(self, root, by, value, fields):
+        rows = []
+        for tag in self._find_all(root, by, value):
+            row = []
+            for kind, field_by, field_value, name in fields:
+                matches = self._find_all(tag, field_by, field_value)
+                if kind == 'present':
+                    row.append(len(matches) > 0)
+                elif not matches:
+                    row.append(None)
+                elif kind == 'text':
+                    row.append(self._text(matches[0]))
+                else:
+                    row.append(self._attribute(matches[0], name))
+            rows.append(row)
+        return rows
+
+    def _read_attributes(self, root, items):
+        results = []
+        for by, value, name in items:
+            matches = self._find_all(root, by, value)
+            results.append(matches and [True, self._attribute(matches[0], name)] or [False, None])
+        return results
+
+    def _read_options(self, root, by, value):
+        selects = self._find_all(root, by, value)
+        if not selects:
+            return None
+        return [[self._attribute(option, 'value'), self._text(option)] for option in selects[0].find_all('option')]
+
+    def _read_visibility(self, root, locators):
+        results = []
+        for by, value in locators:
+            matches = self._find_all(root, by, value)
+            results.append(self._is_displayed(matches[0]) if matches else None)
+        return results
+
+    def _wait_for_state(self, root, by, value, state, timeout):
+        # nothing changes the parsed page by itself, so the state is either met now or never
+        tags = self._find_all(root, by, value)
+        visible = len(tags) > 0 and self._is_displayed(tags[0])
+        return {'present': len(tags) > 0, 'not present': not tags,
+                'visible': visible, 'not visible': not visible}[state]
+
+    # Reading the parsed page
+
+    def _element(self, tag):
+        if id(tag) not in self._elements:
+            self._elements[id(tag)] = StaticElement(self, tag)
+        return self._elements[id(tag)]
+
+    def _find_all(self, root, by, value):
+        if root is None:
+            if by == 'id':
+                return self._by_id(value)
+            root = self.soup
+        if by == 'id':
+            return root.find_all(id=value)
+        if by == 'name':
+            return root.find_all(attrs={'name': value})
+        if by == 'css selector':
+            return root.select(value)
+        if by == 'tag name':
+            return root.find_all(value)
+        if by == 'class name':
+            return root.find_all(class_=value)
+        if by in ('link text', 'partial link text'):
+            return [a for a in root.find_all('a')
+                    if (by == 'link text' and self._text(a) == value) or
+                    (by == 'partial link text' and value in self._text(a))]
+        raise StaticBackendError('the %s locator strategy' % by)
+
+    def _by_id(self, value):
+        """Return the elements with the id, from an index of the whole page built on first use."""
+        if self._id_index is None:
+            self._id_index = {}
+            for tag in self.soup.find_all(id=True):
+                self._id_index.setdefault(tag['id'], []).append(tag)
+        return self._id_index.get(value, [])
+
+    def _text(self, tag):
+        return re.sub(r'\s+', ' ', tag.get_text()).strip()
+
+    def _attribute(self, tag, name):
+        value = tag.get(name)
+        if isinstance(value, list):
+            value = ' '.join(value)
+        if name in ('href', 'src') and value is not None:
+            return urljoin(self.url, value)
+        if name == 'value' and value is None and tag.name == 'option':
+            return self._text(tag)
+        return value
+
+    def _is_displayed(self, tag):
+        if tag.name in ('script', 'style', 'head', 'title') or tag.get('type') == 'hidden':
+            return False
+        for node in [tag] + list(tag.parents):
+            style = (node.get('style') or '').replace(' ', '')
+            if 'display:none' in style or node.get('hidden') is not None:
+                return False
+        return True
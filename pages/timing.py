@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+import os
+import time
+
+from instrumentation import percentile
+
+# The recorder that Page.open reports page loads to, set by conftest.py for --page-timing
+recorder = None
+
+# The metrics of a page load that are aggregated into percentiles
+METRICS = ('ttfb_ms', 'dom_content_loaded_ms', 'load_ms', 'first_contentful_paint_ms', 'total_bytes')
+
+
+def page_load(result):
+    """
+    Return the metrics of a page load from the result of the READ_PAGE_TIMING script, or None when
+    there is no timing or the load event has not ended.
+    """
+    if not result or result == 'loading':
+        return None
+    navigation, paints, resources = result
+    ttfb, dom_content_loaded, load, document_bytes = navigation
+    paints = dict((name, round(start, 1)) for name, start in paints)
+    resources = [{
+        'url': url,
+        'type': initiator_type,
+        # cached responses transfer nothing, but their body still counts towards the page weight
+        'bytes': int(transfer_size or encoded_size),
+        'duration_ms': round(duration, 1),
+    } for url, initiator_type, transfer_size, encoded_size, duration in resources]
+    resources.sort(key=lambda resource: -resource['bytes'])
+    return {
+        'ttfb_ms': round(ttfb, 1),
+        'dom_content_loaded_ms': round(dom_content_loaded, 1),
+        'load_ms': round(load, 1),
+        'first_paint_ms': paints.get('first-paint'),
+        'first_contentful_paint_ms': paints.get('first-contentful-paint'),
+        'total_bytes': int(document_bytes) + sum(resource['bytes'] for resource in resources),
+        'resources': resources,
+    }
+
+
+class TimingRecorder(object):
+    """
+    Collects the timing of every page load, aggregates the loads of each url into percentiles, checks
+    them against budgets and keeps them in a history file between runs.
+    """
+
+    def __init__(self, history_path=None, max_history=200, load_budget_ms=None, bytes_budget=None):
+        self.history_path = history_path
+        self.max_history = max_history
+        self.load_budget_ms = load_budget_ms
+        self.bytes_budget = bytes_budget
+        self.current_test = None
+        self.loads = {}
+        self.history = {}
+        if history_path and os.path.exists(history_path):
+            with open(history_path) as f:
+                self.history = json.load(f)
+
+    def record(self, url, load):
+        """Add a page load of the url, as returned by page_load(), and return it."""
+        load = dict(load, test=self.current_test, time=time.time())
+        self.loads.setdefault(url, []).append(load)
+        return load
+
+    def summary(self, url, loads=None):
+        """Return the p50 and p95 of each metric over the loads of the url in this run, and its heaviest resources."""
+        loads = loads or self.loads.get(url, [])
+        summary = {'loads': len(loads)}
+        for metric in METRICS:
+            values = [load[metric] for load in loads if load.get(metric) is not None]
+            summary[metric] = values and {'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95)} or None
+        if loads and 'resources' in loads[-1]:
+            summary['heaviest'] = [(resource['url'], resource['bytes']) for resource in loads[-1]['resources'][:5]]
+        return summary
+
+    def over_budget(self, url):
+        """Return a message for each budget that the loads of the url in this run exceed."""
+        summary = self.summary(url)
+        messages = []
+        load = summary['load_ms']
+        if self.load_budget_ms is not None and load and load['p95'] > self.load_budget_ms:
+            messages.append('%s took %s ms to load at p95, over the budget of %s ms.'
+                            % (url, load['p95'], self.load_budget_ms))
+        total_bytes = summary['total_bytes']
+        if self.bytes_budget is not None and total_bytes and total_bytes['p95'] > self.bytes_budget:
+            heaviest = summary.get('heaviest') and ' The heaviest resource is %s (%s bytes).' % summary['heaviest'][0] or ''
+            messages.append('%s transferred %s bytes at p95, over the budget of %s bytes.%s'
+                            % (url, total_bytes['p95'], self.bytes_budget, heaviest))
+        return messages
+
+    def save(self):
+        """Add the loads of this run to the history file, keeping the last max_history loads of each url."""
+        if not self.history_path:
+            return
+        for url, loads in self.loads.items():
+            history = self.history.setdefault(url, [])
+            for load in loads:
+                entry = dict((key, value) for key, value in load.items() if key != 'resources')
+                entry['heaviest'] = [[resource['url'], resource['bytes']] for resource in load['resources'][:5]]
+                history.append(entry)
+            del history[:-self.max_history]
+        temp_path = self.history_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.history, f, indent=2, sort_keys=True)
+        os.rename(temp_path, self.history_path)
+
+    def summary_lines(self):
+        """Return a short table of the loads of each url in this run, and in the history file."""
+        lines = ['%-50s %6s %10s %10s %10s %12s' % ('url', 'loads', 'p50 ms', 'p95 ms', 'p95 ttfb', 'p95 bytes')]
+        for url in sorted(self.loads):
+            for label, loads in (('', self.loads[url]), (' (history)', self.history.get(url))):
+                if not loads:
+                    continue
+                summary = self.summary(url, loads)
+                lines.append('%-50s %6d %10s %10s %10s %12s' % (
+                    url + label, summary['loads'],
+                    summary['load_ms'] and summary['load_ms']['p50'],
+                    summary['load_ms'] and summary['load_ms']['p95'],
+                    summary['ttfb_ms'] and summary['ttfb_ms']['p95'],
+                    summary['total_bytes'] and summary['total_bytes']['p95']))
+            heaviest = self.summary(url).get('heaviest')
+            if heaviest:
+                lines.append('    heaviest resource: %s (%s bytes)' % heaviest[0])
+        return lines
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Compares screenshots with stored baselines, a tile at a time.
+Screenshots are cut into square tiles and every tile is hashed at once with NumPy, so that only the
+tiles whose hashes changed are compared pixel by pixel. Baselines are stored as a manifest of tile
+hashes per snapshot, with the tiles themselves kept once each in a content-addressed store, so the
+tiles that snapshots have in common, such as blank space, take no extra room.
+Needs numpy and Pillow.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import zlib
+from collections import namedtuple
+
+try:
+    import numpy
+    from PIL import Image
+except ImportError:
+    numpy = Image = None
+
+# The baseline store that Page.check_visual compares with, set by conftest.py
+baselines = None
+
+TILE_SIZE = 32
+
+VisualDiff = namedtuple('VisualDiff', 'name new changed_tiles total_tiles changed_pixels boxes diff_path')
+
+
+def _require():
+    if numpy is None:
+        raise ImportError('Visual snapshots need numpy and Pillow: pip install numpy Pillow')
+
+
+def decode(png):
+    """Return the PNG image as an array of RGB pixels, of shape (height, width, 3)."""
+    _require()
+    return numpy.asarray(Image.open(io.BytesIO(png)).convert('RGB'))
+
+
+def tiles(pixels, size=TILE_SIZE):
+    """Return the image cut into tiles, as an array of shape (rows, columns, size * size * 3), padded with black."""
+    height, width = pixels.shape[:2]
+    rows, columns = -(-height // size), -(-width // size)
+    padded = numpy.zeros((rows * size, columns * size, 3), numpy.uint8)
+    padded[:height, :width] = pixels
+    return numpy.ascontiguousarray(
+        padded.reshape(rows, size, columns, size, 3).swapaxes(1, 2)).reshape(rows, columns, size * size * 3)
+
+
+def _weights(length):
+    # two fixed sets of odd weights, so that a change of a single word always changes the hash
+    state = numpy.random.RandomState(20130814)
+    return (state.randint(0, 2 ** 62, size=(2, length)).astype(numpy.uint64) * 2 + 1)
+
+
+def tile_hashes(tile_array):
+    """Return a 128 bit hash of every tile, computed for all of them at once, as an array of shape (rows, columns, 2)."""
+    words = tile_array.view(numpy.uint64)
+    weights = _weights(words.shape[-1])
+    with numpy.errstate(over='ignore'):
+        return numpy.stack([(words * weights[0]).sum(axis=-1, dtype=numpy.uint64),
+                            (words * weights[1]).sum(axis=-1, dtype=numpy.uint64)], axis=-1)
+
+
+def _groups(mask):
+    """Return the groups of neighbouring true cells of a 2d mask, as lists of (row, column)."""
+    seen = numpy.zeros(mask.shape, bool)
+    groups = []
+    for start in zip(*numpy.nonzero(mask)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        group, stack = [], [start]
+        while stack:
+            row, column = stack.pop()
+            group.append((row, column))
+            for neighbour in ((row + dr, column + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+                if 0 <= neighbour[0] < mask.shape[0] and 0 <= neighbour[1] < mask.shape[1] \
+                        and mask[neighbour] and not seen[neighbour]:
+                    seen[neighbour] = True
+                    stack.append(neighbour)
+        groups.append(group)
+    return groups
+
+
+def diff_image(pixels, changed, boxes):
+    """Return a PNG of the image faded, with the changed pixels in red and each changed region outlined."""
+    faded = (pixels.astype(numpy.uint16) + 2 * 255) // 3
+    faded = faded.astype(numpy.uint8)
+    faded[changed] = (255, 0, 0)
+    for left, top, right, bottom in boxes:
+        faded[top, left:right] = faded[bottom - 1, left:right] = (255, 0, 255)
+        faded[top:bottom, left] = faded[top:bottom, right - 1] = (255, 0, 255)
+    output = io.BytesIO()
+    Image.fromarray(faded).save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+
+class BaselineStore(object):
+    """
+    Keeps the baselines of named snapshots in a directory: snapshots/<name>.json lists the hash and
+    content address of every tile, and tiles/ holds each distinct tile once, compressed.
+    """
+
+    def __init__(self, directory, tolerance=16, update=False, diff_directory=None):
+        _require()
+        self.directory = directory
+        self.tolerance = tolerance
+        self.update = update
+        self.diff_directory = diff_directory or os.path.join(directory, 'diffs')
+
+    def _snapshot_path(self, name):
+        return os.path.join(self.directory, 'snapshots', re.sub(r'[^\w.@-]+', '_', name) + '.json')
+
+    def _tile_path(self, address):
+        return os.path.join(self.directory, 'tiles', address[:2], address[2:])
+
+    def _load_tile(self, address):
+        with open(self._tile_path(address), 'rb') as f:
+            return numpy.frombuffer(zlib.decompress(f.read()), numpy.uint8)
+
+    def save(self, name, pixels):
+        """Store the image as the baseline of the named snapshot."""
+        tile_array = tiles(pixels)
+        hashes = tile_hashes(tile_array)
+        addresses = []
+        for tile in tile_array.reshape(-1, tile_array.shape[-1]):
+            data = tile.tobytes()
+            address = hashlib.sha1(data).hexdigest()
+            path = self._tile_path(address)
+            if not os.path.exists(path):
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                with open(path, 'wb') as f:
+                    f.write(zlib.compress(data, 9))
+            addresses.append(address)
+        path = self._snapshot_path(name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            json.dump({
+                'shape': list(pixels.shape[:2]),
+                'tile_size': TILE_SIZE,
+                'hashes': ['%016x%016x' % (first, second) for first, second in hashes.reshape(-1, 2)],
+                'tiles': addresses,
+            }, f, separators=(',', ':'))
+
+    def compare(self, name, pixels):
+        """
+        Compare the image with the baseline of the named snapshot and return a VisualDiff. Tiles whose
+        hashes match are skipped; the others are compared pixel by pixel, and a pixel has changed when a
+        channel differs by more than the tolerance. A snapshot without a baseline, or any snapshot when
+        updating, is stored as the new baseline.
+        """
+        path = self._snapshot_path(name)
+        if self.update or not os.path.exists(path):
+            self.save(name, pixels)
+            return VisualDiff(name, True, 0, 0, 0, [], None)
+        with open(path) as f:
+            baseline = json.load(f)
+        tile_array = tiles(pixels)
+        rows, columns = tile_array.shape[:2]
+        height, width = pixels.shape[:2]
+        changed = numpy.zeros((rows * TILE_SIZE, columns * TILE_SIZE), bool)
+        if baseline['shape'] != [height, width] or baseline['tile_size'] != TILE_SIZE:
+            changed[:height, :width] = True
+            changed_tiles = rows * columns
+        else:
+            hashes = tile_hashes(tile_array).reshape(-1, 2)
+            stored = numpy.array([[int(value[:16], 16), int(value[16:], 16)] for value in baseline['hashes']],
+                                 numpy.uint64)
+            changed_tiles = 0
+            for index in numpy.nonzero((hashes != stored).any(axis=-1))[0]:
+                row, column = divmod(int(index), columns)
+                before = self._load_tile(baseline['tiles'][index]).reshape(TILE_SIZE, TILE_SIZE, 3)
+                after = tile_array[row, column].reshape(TILE_SIZE, TILE_SIZE, 3)
+                difference = numpy.abs(after.astype(numpy.int16) - before).max(axis=-1) > self.tolerance
+                if difference.any():
+                    changed_tiles += 1
+                    changed[row * TILE_SIZE:(row + 1) * TILE_SIZE,
+                            column * TILE_SIZE:(column + 1) * TILE_SIZE] = difference
+        changed = changed[:height, :width]
+        boxes = []
+        if changed_tiles:
+            tile_mask = numpy.zeros((rows, columns), bool)
+            for row, column in zip(*numpy.nonzero(changed)):
+                tile_mask[row // TILE_SIZE, column // TILE_SIZE] = True
+            for group in _groups(tile_mask):
+                region = numpy.zeros(changed.shape, bool)
+                for row, column in group:
+                    region[row * TILE_SIZE:(row + 1) * TILE_SIZE, column * TILE_SIZE:(column + 1) * TILE_SIZE] = True
+                ys, xs = numpy.nonzero(changed & region)
+                boxes.append((int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1))
+        diff_path = None
+        if boxes:
+            if not os.path.isdir(self.diff_directory):
+                os.makedirs(self.diff_directory)
+            diff_path = os.path.join(self.diff_directory, os.path.basename(path)[:-len('.json')] + '.png')
+            with open(diff_path, 'wb') as f:
+                f.write(diff_image(pixels, changed, boxes))
+        return VisualDiff(name, False, changed_tiles, rows * columns, int(changed.sum()), boxes, diff_path)
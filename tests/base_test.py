@@ -4,21 +4,48 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-import requests
+from unittestzero import Assert
+
+from crawler import Crawler
+from link_checker import LinkChecker
 
 
 class BaseTest:
     """A base test class that can be extended by other tests to include utility methods."""
 
+    _link_checkers = {}
+    # Set by conftest.py when the run is started with --link-cache
+    link_cache = None
+    # Set by conftest.py from --crawl-depth and --crawl-checkpoint
+    crawl_depth = 2
+    crawl_checkpoint = None
+
+    def link_checker(self, timeout):
+        """Return the shared link checker for the specified timeout, keeping its connections alive between tests."""
+        if timeout not in BaseTest._link_checkers:
+            BaseTest._link_checkers[timeout] = LinkChecker(timeout, cache=BaseTest.link_cache)
+        return BaseTest._link_checkers[timeout]
+
+    @staticmethod
+    def close_link_checkers():
+        """Close the connections of every shared link checker, at the end of the run."""
+        for link_checker in BaseTest._link_checkers.values():
+            link_checker.close()
+        BaseTest._link_checkers.clear()
+
     def get_response_code(self, url, timeout):
         """Return the response code for a get request to the specified url."""
-        # this sets max_retries to 5
-        requests.adapters.DEFAULT_RETRIES = 5
-        try:
-            r = requests.get(url, verify=False, allow_redirects=True, timeout=timeout, headers={'User-Agent': 'a user agent'})
-            return r.status_code
-        except requests.Timeout:
-            return 408
+        return self.link_checker(timeout).response_code(url)
+
+    def find_bad_links(self, urls, timeout, message='%s is not a valid url - status code: %s.'):
+        """Check all of the urls concurrently and return a report line for each one that is not valid."""
+        return self.link_checker(timeout).bad_links(urls, message)
+
+    def find_broken_links_on_site(self, mozwebqa, page):
+        """Crawl the site from the page, following links on the same site, and return a report line for each broken url."""
+        crawler = Crawler(mozwebqa.base_url + page._page_url_suffix, self.link_checker(mozwebqa.timeout),
+                          max_depth=BaseTest.crawl_depth, checkpoint_path=BaseTest.crawl_checkpoint)
+        return crawler.crawl()
 
     def make_absolute(self, url, base_url):
         """Return the url argument as an absolute url."""
@@ -27,19 +54,16 @@ class BaseTest:
         return base_url + url
 
     def are_links_are_valid(self, mozwebqa, link_list):
-        bad_links = []
-        for link in link_list:
-            if link['href'] != '#':
-                url = self.make_absolute(link['href'], mozwebqa.base_url)
-                response_code = self.get_response_code(url, mozwebqa.timeout)
-                if response_code != requests.codes.ok:
-                    bad_links.append('%s is not a valid url - status code: %s.' % (url, response_code))
+        urls = [self.make_absolute(link['href'], mozwebqa.base_url)
+                for link in link_list if link['href'] != '#']
+        bad_links = self.find_bad_links(urls, mozwebqa.timeout)
         Assert.equal(0, len(bad_links), '%s bad urls found: ' % len(bad_links) + ', '.join(bad_links))
 
     def are_links_are_visible(self, browser_width, page, link_list):
-        bad_links = []
-        for link in link_list:
-            if link.get('min-width') > browser_width or link.get('min-width') == None:
-                if not page.is_element_visible(*link.get('locator')):
-                    bad_links.append('The link at %s is not visible' % link.get('locator')[1:])
+        """Assert that every link without a min-width, or with one up to browser_width, is visible."""
+        expected = [link for link in link_list
+                    if link.get('min-width') is None or link.get('min-width') <= browser_width]
+        visible = page.visibility([link.get('locator') for link in expected])
+        bad_links = ['The link at %s is not visible' % link.get('locator')[1]
+                     for link, shown in zip(expected, visible) if not shown]
         Assert.equal(0, len(bad_links), '%s bad links found: ' % len(bad_links) + ', '.join(bad_links))
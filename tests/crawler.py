@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import codecs
+import json
+import os
+from collections import deque
+from multiprocessing.pool import ThreadPool
+try:
+    from HTMLParser import HTMLParser
+    from urlparse import urljoin, urlsplit
+except ImportError:
+    from html.parser import HTMLParser
+    from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from link_checker import normalize_url
+
+
+# The attributes that point at other urls, by tag
+LINK_ATTRIBUTES = {
+    'a': 'href',
+    'link': 'href',
+    'img': 'src',
+    'script': 'src',
+    'iframe': 'src',
+    'source': 'src',
+}
+
+
+class LinkExtractor(HTMLParser):
+    """Collects the urls a page links to while its html is fed in, a chunk at a time."""
+
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.urls = []
+
+    def handle_starttag(self, tag, attrs):
+        name = LINK_ATTRIBUTES.get(tag)
+        if name is not None:
+            for attribute, value in attrs:
+                if attribute == name and value:
+                    self.urls.append(value.strip())
+
+    handle_startendtag = handle_starttag
+
+
+class Crawler(object):
+    """
+    Crawls a site from start_url, following same-origin links up to max_depth hops, and checks
+    every url it finds once. Pages are parsed as they stream in, so they are never held in memory
+    whole, and up to workers urls are fetched at a time through a LinkChecker.
+    When checkpoint_path is given the crawl state is saved there every checkpoint_every urls, and a
+    crawl that was interrupted continues from it.
+    """
+
+    def __init__(self, start_url, link_checker, max_depth=2, workers=8, checkpoint_path=None,
+                 checkpoint_every=100):
+        self.start_url = normalize_url(start_url)
+        self.origin = urlsplit(self.start_url)[:2]
+        self.link_checker = link_checker
+        self.max_depth = max_depth
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.seen = set([self.start_url])
+        self.frontier = deque([(self.start_url, 0, None)])
+        self.broken = []
+        self.checked = 0
+        self._load_checkpoint()
+
+    def is_internal(self, url):
+        return urlsplit(url)[:2] == self.origin
+
+    def crawl(self):
+        """Crawl the site and return a report line for each broken url."""
+        pool = ThreadPool(self.workers)
+        try:
+            while self.frontier:
+                batch = [self.frontier.popleft()
+                         for i in range(min(self.checkpoint_every, len(self.frontier)))]
+                for (url, depth, referrer), (status, links) in zip(batch, pool.map(self._visit, batch)):
+                    self.checked += 1
+                    if status != requests.codes.ok:
+                        self.broken.append('%s is not a valid url - status code: %s (linked from %s).'
+                                           % (url, status, referrer or 'the start page'))
+                    for link in links:
+                        if link not in self.seen:
+                            self.seen.add(link)
+                            self.frontier.append((link, depth + 1, url))
+                self._save_checkpoint()
+        finally:
+            pool.close()
+            pool.join()
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return self.broken
+
+    def _visit(self, item):
+        """Return the status of the url and, for pages that are crawled, the urls it links to."""
+        try:
+            return self._fetch(*item)
+        except requests.RequestException as error:
+            # unsupported schemes, malformed urls and timeouts are broken links, not reasons to stop
+            return 'request failed (%s)' % type(error).__name__, []
+        except ValueError:
+            return 'invalid url', []
+
+    def _fetch(self, url, depth, referrer):
+        if not (self.is_internal(url) and depth <= self.max_depth):
+            return self.link_checker.response_code(url), []
+        response = self.link_checker.stream(url)
+        if response is None:
+            return 408, []
+        try:
+            if response.status_code != requests.codes.ok or \
+                    'html' not in response.headers.get('content-type', ''):
+                return response.status_code, []
+            return response.status_code, self._extract_links(response)
+        finally:
+            response.close()
+
+    def _extract_links(self, response):
+        extractor = LinkExtractor()
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        for chunk in response.iter_content(16 * 1024):
+            extractor.feed(decoder.decode(chunk))
+        extractor.feed(decoder.decode(b'', final=True))
+        extractor.close()
+        links = []
+        for href in extractor.urls:
+            if href.startswith('#') or href.split(':', 1)[0].lower() in ('mailto', 'javascript', 'tel', 'data'):
+                continue
+            try:
+                links.append(normalize_url(urljoin(response.url, href)))
+            except ValueError:
+                # a malformed url is kept as it is, to be reported when it fails to load
+                links.append(href)
+        return links
+
+    def _load_checkpoint(self):
+        if not (self.checkpoint_path and os.path.exists(self.checkpoint_path)):
+            return
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        if state['start_url'] != self.start_url or state['max_depth'] != self.max_depth:
+            return
+        self.seen = set(state['seen'])
+        self.frontier = deque(tuple(item) for item in state['frontier'])
+        self.broken = state['broken']
+        self.checked = state['checked']
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({
+                'start_url': self.start_url,
+                'max_depth': self.max_depth,
+                'seen': sorted(self.seen),
+                'frontier': list(self.frontier),
+                'broken': self.broken,
+                'checked': self.checked,
+            }, f)
+        os.rename(temp_path, self.checkpoint_path)
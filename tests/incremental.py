@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+try:
+    from urlparse import urljoin
+except ImportError:
+    from urllib.parse import urljoin
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+from pages.page import Page
+
+CACHED_REASON = 'cached pass: the pages and the code of this test are unchanged since it last passed'
+
+# The BaseTest methods that check links, which point outside the pages a fingerprint covers
+LINK_CHECKS = ('get_response_code', 'find_bad_links', 'find_broken_links_on_site', 'are_links_are_valid')
+
+
+def _digest(*parts):
+    sha = hashlib.sha1()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else part.encode('utf-8'))
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+class IncrementalRun(object):
+    """
+    Skips nondestructive tests that passed before against the same pages with the same code.
+    A test is fingerprinted by the html of each page object it uses, the stylesheets and scripts those
+    pages load, and the source of the test, its page objects and the modules they are built from.
+    Tests that pass are stored with their fingerprint; on the next run a test with the same fingerprint
+    is skipped and reported as cached. Tests that check links, or are marked external, always run. With
+    full_run every test runs, and the fingerprints are refreshed.
+    """
+
+    def __init__(self, path, full_run=False, timeout=60):
+        self.path = path
+        self.full_run = full_run
+        self.timeout = timeout
+        self.passed = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.passed = json.load(f)
+        self.cached = set()
+        self._fingerprints = {}
+        self._page_fingerprints = {}
+        self._file_hashes = {}
+
+    def page_classes(self, item):
+        """Return the page objects of the test's module that the test function refers to."""
+        source = inspect.getsource(item.obj)
+        return [value for name, value in sorted(vars(item.module).items())
+                if inspect.isclass(value) and issubclass(value, Page) and re.search(r'\b%s\b' % name, source)]
+
+    def page_fingerprint(self, url):
+        """Return a hash of the html at the url and of the stylesheets and scripts it loads, or None."""
+        if url not in self._page_fingerprints:
+            try:
+                response = requests.get(url, timeout=self.timeout)
+                if response.status_code != requests.codes.ok:
+                    raise requests.RequestException(response.status_code)
+                parts = [response.content]
+                soup = BeautifulSoup(response.content, 'html.parser')
+                assets = [tag['href'] for tag in soup.find_all('link', href=True)
+                          if 'stylesheet' in (tag.get('rel') or [])]
+                assets += [tag['src'] for tag in soup.find_all('script', src=True)]
+                for asset in assets:
+                    asset_response = requests.get(urljoin(response.url, asset), timeout=self.timeout)
+                    parts.extend([asset, str(asset_response.status_code), asset_response.content])
+                self._page_fingerprints[url] = _digest(*parts)
+            except requests.RequestException:
+                self._page_fingerprints[url] = None
+        return self._page_fingerprints[url]
+
+    def _file_hash(self, module):
+        path = os.path.abspath(inspect.getsourcefile(module))
+        if path not in self._file_hashes:
+            with open(path, 'rb') as f:
+                self._file_hashes[path] = _digest(f.read())
+        return self._file_hashes[path]
+
+    def fingerprint(self, item):
+        """Return the fingerprint of the test, or None when a page it uses could not be fetched."""
+        if item.nodeid not in self._fingerprints:
+            base_url = item.config.option.base_url or ''
+            classes = self.page_classes(item)
+            modules = set([item.module])
+            for cls in classes + [item.cls]:
+                for base in inspect.getmro(cls or object):
+                    module = sys.modules.get(base.__module__)
+                    if module is not None and base.__module__ not in ('__builtin__', 'builtins'):
+                        modules.add(module)
+            # the helpers the page objects are built from, such as their scripts, are in the same package
+            directories = set(os.path.dirname(os.path.abspath(module.__file__)) for module in modules)
+            for module in list(sys.modules.values()):
+                path = getattr(module, '__file__', None)
+                if path and os.path.dirname(os.path.abspath(path)) in directories and inspect.getsourcefile(module):
+                    modules.add(module)
+            parts = [inspect.getsource(item.obj)]
+            parts.extend(sorted(self._file_hash(module) for module in modules))
+            for cls in classes:
+                parts.append(self.page_fingerprint(base_url + cls._page_url_suffix))
+            self._fingerprints[item.nodeid] = None not in parts and _digest(*parts) or None
+        return self._fingerprints[item.nodeid]
+
+    def checks_external_resources(self, item):
+        """
+        Return true if the test checks resources that its fingerprint does not cover: it is marked
+        external, or it checks links, whose targets can break while its pages stay the same.
+        """
+        if 'external' in item.keywords:
+            return True
+        return re.search(r'\.(%s)\(' % '|'.join(LINK_CHECKS), inspect.getsource(item.obj)) is not None
+
+    def cacheable(self, item):
+        return 'nondestructive' in item.keywords and 'xfail' not in item.keywords and \
+            not self.checks_external_resources(item)
+
+    @pytest.mark.tryfirst
+    def pytest_runtest_setup(self, item):
+        if not self.cacheable(item):
+            return
+        # the fingerprint is taken before the test runs, and stored if the test passes
+        fingerprint = self.fingerprint(item)
+        if not self.full_run and fingerprint is not None and self.passed.get(item.nodeid) == fingerprint:
+            self.cached.add(item.nodeid)
+            pytest.skip(CACHED_REASON)
+
+    def pytest_runtest_logreport(self, report):
+        if report.nodeid in self.cached:
+            return
+        if report.failed:
+            self.passed.pop(report.nodeid, None)
+        elif report.when == 'call' and report.passed and report.nodeid in self._fingerprints:
+            fingerprint = self._fingerprints[report.nodeid]
+            if fingerprint is not None:
+                self.passed[report.nodeid] = fingerprint
+
+    def pytest_report_teststatus(self, report):
+        if report.skipped and report.nodeid in self.cached:
+            return 'cached', 'c', 'CACHED'
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.passed, f, indent=2, sort_keys=True)
+        os.rename(temp_path, self.path)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+import os
+import threading
+import time
+
+import requests
+
+from link_checker import normalize_url
+
+
+class LinkCache(object):
+    """
+    An on-disk cache of link check results keyed by normalized url.
+    Entries older than ttl seconds are revalidated with conditional requests,
+    and the least recently checked entries are evicted past max_entries.
+    With recheck set to 'stale' only stale or previously failing links are requested again,
+    with 'all' every link is revalidated (cheaply, when the server sent validators).
+    """
+
+    def __init__(self, path, ttl=24 * 60 * 60, max_entries=5000, recheck='stale'):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.recheck = recheck
+        self.hits = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._entries = json.load(f)
+            except ValueError:
+                # a truncated cache file is not worth failing a test run over
+                self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url):
+        """Return the cached entry for the url, or None."""
+        with self._lock:
+            return self._entries.get(normalize_url(url))
+
+    def count_hit(self):
+        """Record that a fresh entry was used without asking the server."""
+        with self._lock:
+            self.hits += 1
+
+    def count_revalidation(self):
+        """Record that the server confirmed a stale entry with 304 Not Modified."""
+        with self._lock:
+            self.revalidated += 1
+
+    def is_fresh(self, entry):
+        """Return true if the entry can be used without asking the server again."""
+        if entry is None or self.recheck == 'all':
+            return False
+        return entry['status'] == requests.codes.ok and time.time() - entry['checked'] < self.ttl
+
+    def validators(self, entry):
+        """Return the conditional request headers for revalidating the entry."""
+        headers = {}
+        if entry is not None and entry['status'] == requests.codes.ok:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, status, response=None):
+        """Record the result of checking the url."""
+        headers = response is not None and response.headers or {}
+        with self._lock:
+            self._entries[normalize_url(url)] = {
+                'status': status,
+                'checked': time.time(),
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+            }
+            self._evict()
+
+    def _evict(self):
+        if len(self._entries) > self.max_entries:
+            oldest = sorted(self._entries, key=lambda key: self._entries[key]['checked'])
+            for key in oldest[:len(self._entries) - self.max_entries]:
+                del self._entries[key]
+
+    def entries(self):
+        """Return a copy of every entry, by normalized url."""
+        with self._lock:
+            return dict(self._entries)
+
+    def merge(self, entries):
+        """Add entries recorded elsewhere, such as by a --shards worker, keeping the latest check of each url."""
+        with self._lock:
+            for url, entry in entries.items():
+                if url not in self._entries or self._entries[url]['checked'] < entry['checked']:
+                    self._entries[url] = entry
+            self._evict()
+
+    def save(self):
+        """Write the cache to disk, replacing the previous file in one step."""
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.rename(temp_path, self.path)
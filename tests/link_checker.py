@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+try:
+    from urlparse import urlsplit, urlunsplit
+except ImportError:
+    from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """Return the url with a lowercase scheme and host, no default port and no fragment."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = '%s:%s' % (netloc, parts.port)
+    if parts.username:
+        netloc = '%s@%s' % (parts.username, netloc)
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+class LinkChecker(object):
+    """
+    Check the response codes of many urls concurrently.
+    Urls are deduplicated after normalization, and no more than max_per_host requests hit one host
+    at a time. The worker threads share one keep-alive session, which lasts as long as the checker,
+    so connections are reused from one check to the next until close() is called.
+    When a LinkCache is given, fresh results are reused and stale ones are revalidated
+    with conditional requests.
+    """
+
+    user_agent = 'a user agent'
+
+    def __init__(self, timeout, workers=16, max_per_host=4, max_hosts=100, retries=5, backoff=0.5, cache=None):
+        self.timeout = timeout
+        self.cache = cache
+        self.workers = workers
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self._host_locks = {}
+        self._host_locks_lock = threading.Lock()
+        self._pool = None
+        self.session = requests.Session()
+        # a connection pool is kept for each of up to max_hosts hosts, with up to max_per_host connections
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_per_host,
+                                                max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = self.user_agent
+
+    def _host_lock(self, url):
+        host = urlsplit(url).netloc
+        with self._host_locks_lock:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_locks[host]
+
+    def response_code(self, url):
+        """Return the response code for a get request to the specified url."""
+        if self.cache is None:
+            return self._request(url)[0]
+        entry = self.cache.get(url)
+        if self.cache.is_fresh(entry):
+            self.cache.count_hit()
+            return entry['status']
+        status, response = self._request(url, self.cache.validators(entry))
+        if status == requests.codes.not_modified and entry is not None:
+            self.cache.count_revalidation()
+            status = entry['status']
+        self.cache.store(url, status, response)
+        return status
+
+    def _request(self, url, headers=None):
+        """
+        Return the response code and response for the url.
+        A HEAD request is tried first, and a GET is only sent when HEAD gives no usable answer.
+        A url that cannot be requested at all, such as one with an unsupported scheme, gets a
+        description of the error instead of a response code.
+        """
+        response = None
+        for method in ('head', 'get'):
+            try:
+                response = self._send(method, url, headers)
+            except requests.RequestException as error:
+                return 'request failed (%s)' % type(error).__name__, None
+            if response is None:
+                return 408, None
+            if response.status_code in (requests.codes.ok, requests.codes.not_modified):
+                break
+        return response.status_code, response
+
+    def stream(self, url):
+        """Return the response to a get request for the url with its body not read yet, or None on a timeout."""
+        return self._send('get', url, None, stream=True)
+
+    def _send(self, method, url, headers, stream=False):
+        attempt = 0
+        while True:
+            try:
+                with self._host_lock(url):
+                    return self.session.request(method, url, headers=headers, verify=False, stream=stream,
+                                                allow_redirects=True, timeout=self.timeout)
+            except requests.Timeout:
+                return None
+            except requests.ConnectionError:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+
+    def check(self, urls):
+        """Return a dict mapping each distinct normalized url to its response code."""
+        unique_urls = []
+        seen = set()
+        for url in urls:
+            url = normalize_url(url)
+            if url not in seen:
+                seen.add(url)
+                unique_urls.append(url)
+        if not unique_urls:
+            return {}
+        if self._pool is None:
+            self._pool = ThreadPool(self.workers)
+        return dict(zip(unique_urls, self._pool.map(self.response_code, unique_urls)))
+
+    def close(self):
+        """Stop the worker threads and close the kept-alive connections."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self.session.close()
+
+    def bad_links(self, urls, message='%s is not a valid url - status code: %s.'):
+        """Return a report line for each url that did not respond with 200, in page order."""
+        codes = self.check(urls)
+        bad_links = []
+        for url in urls:
+            code = codes.pop(normalize_url(url), None)
+            if code is not None and code != requests.codes.ok:
+                bad_links.append(message % (url, code))
+        return bad_links
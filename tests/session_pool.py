@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+
+from pages.page import Page
+
+
+class SessionPool(object):
+    """
+    Keeps browser sessions open between nondestructive tests.
+    pytest-mozwebqa starts a browser before every test and quits it afterwards. Once installed, the pool
+    hands the browser of a finished nondestructive test to the next one that asks for the same browser,
+    and only destructive tests, and tests marked fresh_session, get a browser of their own.
+    """
+
+    def __init__(self, max_idle=1):
+        self.max_idle = max_idle
+        self.reuse_next = False
+        self.started = 0
+        self.reused = 0
+        self._idle = {}
+
+    def should_reuse(self, item):
+        """Return true if the test may share a browser with other tests."""
+        return 'nondestructive' in item.keywords and 'fresh_session' not in item.keywords
+
+    def key(self, client):
+        """Return what a browser must match to be handed to the client."""
+        return json.dumps([getattr(client, name, None) for name in (
+            'driver', 'capabilities', 'browser_name', 'browser_version', 'platform',
+            'firefox_path', 'firefox_preferences', 'profile_path', 'extension_paths',
+            'chrome_path', 'chrome_options', 'proxy_host', 'proxy_port')])
+
+    def acquire(self, client):
+        """Give the client an idle browser and return true, or return false if there is none."""
+        idle = self._idle.get(self.key(client))
+        if not (self.reuse_next and idle):
+            return False
+        client.selenium = idle.pop()
+        self.reused += 1
+        return True
+
+    def release(self, client):
+        """Keep the client's browser for the next test and return true, or return false if it should quit."""
+        idle = self._idle.setdefault(self.key(client), [])
+        if not self.reuse_next or len(idle) >= self.max_idle:
+            return False
+        try:
+            Page.reset_session(client.selenium)
+        except Exception:
+            # a browser that cannot be reset is not worth keeping
+            return False
+        idle.append(client.selenium)
+        return True
+
+    def close(self):
+        """Quit all of the idle browsers."""
+        for idle in self._idle.values():
+            for selenium in idle:
+                try:
+                    selenium.quit()
+                except Exception:
+                    pass
+        self._idle = {}
+
+    def install(self):
+        """Make pytest-mozwebqa's webdriver client start and stop browsers through the pool."""
+        from pytest_mozwebqa.selenium_client import Client
+        start, stop = Client.start, Client.stop
+        pool = self
+
+        def pooled_start(client):
+            if not (client.webdriver and pool.acquire(client)):
+                pool.started += 1
+                start(client)
+
+        def pooled_stop(client):
+            if not (client.webdriver and pool.release(client)):
+                stop(client)
+
+        Client.start = pooled_start
+        Client.stop = pooled_stop
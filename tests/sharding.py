@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import heapq
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from _pytest.runner import TestReport
+
+from pages import instrumentation
+from pages import timing
+from tests.base_test import BaseTest
+
+# Test durations that have not been recorded yet are estimated from the ones that have, or this
+DEFAULT_DURATION = 1.0
+
+
+def shard(durations, workers):
+    """
+    Split a list of (test, duration) pairs into the given number of shards that take about as long
+    as each other, by handing the longest test left to the shard that finishes first.
+    Each shard keeps its tests in their original order.
+    """
+    order = dict((test, index) for index, (test, duration) in enumerate(durations))
+    shards = [(0.0, index, []) for index in range(workers)]
+    for test, duration in sorted(durations, key=lambda pair: -pair[1]):
+        total, index, tests = heapq.heappop(shards)
+        tests.append(test)
+        heapq.heappush(shards, (total + duration, index, tests))
+    return [sorted(tests, key=order.get) for total, index, tests in sorted(shards, key=lambda s: s[1])]
+
+
+class DurationHistory(object):
+    """The durations of past test runs, smoothed so that one slow run does not reshuffle the shards."""
+
+    def __init__(self, path, weight=0.5):
+        self.path = path
+        self.weight = weight
+        self.durations = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.durations = json.load(f)
+
+    def estimate(self, tests):
+        """Return (test, duration) pairs for the tests, estimating the ones that have not run before."""
+        known = sorted(self.durations.values())
+        default = known and known[len(known) // 2] or DEFAULT_DURATION
+        return [(test, self.durations.get(test, default)) for test in tests]
+
+    def update(self, durations):
+        for test, duration in durations.items():
+            previous = self.durations.get(test)
+            if previous is not None:
+                duration = self.weight * duration + (1 - self.weight) * previous
+            self.durations[test] = duration
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.durations, f, indent=2, sort_keys=True)
+        os.rename(temp_path, self.path)
+
+
+class ShardWorker(object):
+    """Runs the tests of one shard in a worker process, and writes the report of each test phase to a file."""
+
+    def __init__(self, shard_path, report_path):
+        with open(shard_path) as f:
+            self.tests = set(json.load(f))
+        self.report_path = report_path
+        self.reports = []
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        deselected = [item for item in items if item.nodeid not in self.tests]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if item.nodeid in self.tests]
+
+    def pytest_runtest_logreport(self, report):
+        longrepr = report.longrepr
+        if longrepr is not None and not isinstance(longrepr, tuple):
+            longrepr = str(longrepr)
+        self.reports.append({
+            'test': report.nodeid,
+            'when': report.when,
+            'outcome': report.outcome,
+            'longrepr': longrepr,
+            'duration': getattr(report, 'duration', 0),
+            'wasxfail': getattr(report, 'wasxfail', None),
+        })
+
+    def state(self, config):
+        """
+        Return what the plugins of this worker recorded, for the controller to merge into its own.
+        Workers save none of it themselves, so that they do not race each other for the same files.
+        """
+        state = {}
+        if instrumentation.profiler is not None:
+            state['profile'] = instrumentation.profiler.records
+        if timing.recorder is not None:
+            state['page_loads'] = timing.recorder.loads
+        incremental_run = getattr(config, '_incremental_run', None)
+        if incremental_run is not None:
+            state['passed'] = dict((test, incremental_run.passed.get(test)) for test in self.tests)
+            state['cached'] = sorted(incremental_run.cached)
+        if BaseTest.link_cache is not None:
+            state['link_cache'] = BaseTest.link_cache.entries()
+        return state
+
+    def pytest_sessionfinish(self, session):
+        with open(self.report_path, 'w') as f:
+            json.dump({'reports': self.reports, 'state': self.state(session.config)}, f)
+
+
+class ShardController(object):
+    """
+    Runs the collected tests in worker processes instead of in this one, and reports their results as
+    if they had run here. Each worker is a pytest run of its own, with its own browser sessions, and the
+    shards are balanced by the test durations recorded in earlier runs. Unless the run records the
+    driver, workers run with --reuse-sessions, so the nondestructive tests of a shard share its browser
+    and destructive tests get one of their own.
+    """
+
+    def __init__(self, workers, durations_path, args=None):
+        self.workers = workers
+        self.history = DurationHistory(durations_path)
+        self.args = args if args is not None else sys.argv[1:]
+        self.wall_times = []
+
+    def worker_args(self):
+        """
+        Return the command line arguments of a worker: those of this run without the ones that start
+        workers, and --reuse-sessions unless the run records the driver, which needs a browser for each
+        test. Options that write files, such as --driver-profile, are passed on: the workers record, and
+        this process merges what they recorded and writes the files once.
+        """
+        args = []
+        skip = False
+        for arg in self.args:
+            if skip:
+                skip = False
+            elif arg in ('--shards', '--shard-durations'):
+                skip = True
+            elif not arg.startswith(('--shards=', '--shard-durations=')):
+                args.append(arg)
+        recording = [arg for arg in args if arg == '--record-driver' or arg.startswith('--record-driver=')]
+        if not recording and '--reuse-sessions' not in args:
+            args.append('--reuse-sessions')
+        return args
+
+    def pytest_runtestloop(self, session):
+        if session.config.option.collectonly:
+            return True
+        items = dict((item.nodeid, item) for item in session.items)
+        shards = shard(self.history.estimate([item.nodeid for item in session.items]), self.workers)
+        reports = []
+        for tests, worker_reports, state in self.run([tests for tests in shards if tests]):
+            reports.extend(worker_reports)
+            self.merge(session.config, tests, state)
+        durations = {}
+        for report in reports:
+            durations[report['test']] = durations.get(report['test'], 0) + report['duration']
+        self.history.update(durations)
+        self.history.save()
+        started = set()
+        for report in reports:
+            item = items[report['test']]
+            if item.nodeid not in started:
+                started.add(item.nodeid)
+                item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+            longrepr = report['longrepr']
+            test_report = TestReport(item.nodeid, item.location, item.keywords, report['outcome'],
+                                     isinstance(longrepr, list) and tuple(longrepr) or longrepr,
+                                     report['when'], duration=report['duration'])
+            if report.get('wasxfail') is not None:
+                test_report.wasxfail = report['wasxfail']
+            item.ihook.pytest_runtest_logreport(report=test_report)
+        missing = [item for item in session.items if item.nodeid not in started]
+        for item in missing:
+            item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+            item.ihook.pytest_runtest_logreport(report=TestReport(
+                item.nodeid, item.location, item.keywords, 'failed',
+                'The worker running this test stopped before reporting it. See its log above.', 'call'))
+        return True
+
+    def merge(self, config, tests, state):
+        """Add what a worker that ran the tests recorded to the plugins of this process."""
+        if instrumentation.profiler is not None:
+            instrumentation.profiler.records.extend(state.get('profile', []))
+        if timing.recorder is not None:
+            for url, loads in state.get('page_loads', {}).items():
+                timing.recorder.loads.setdefault(url, []).extend(loads)
+        incremental_run = getattr(config, '_incremental_run', None)
+        if incremental_run is not None:
+            for test in tests:
+                fingerprint = state.get('passed', {}).get(test)
+                if fingerprint is None:
+                    incremental_run.passed.pop(test, None)
+                else:
+                    incremental_run.passed[test] = fingerprint
+            incremental_run.cached.update(state.get('cached', []))
+        if BaseTest.link_cache is not None:
+            BaseTest.link_cache.merge(state.get('link_cache', {}))
+
+    def run(self, shards):
+        """Run each shard in a worker process and return (tests, reports, state) for each of them."""
+        directory = tempfile.mkdtemp(prefix='casszilla-shards-')
+        try:
+            workers = []
+            for index, tests in enumerate(shards):
+                shard_path = os.path.join(directory, 'shard-%s.json' % index)
+                with open(shard_path, 'w') as f:
+                    json.dump(tests, f)
+                report_path = os.path.join(directory, 'report-%s.json' % index)
+                log = open(os.path.join(directory, 'log-%s.txt' % index), 'w+')
+                command = [sys.executable, '-m', 'pytest'] + self.worker_args() + [
+                    '--shard-file=%s' % shard_path, '--shard-report=%s' % report_path]
+                workers.append((subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT),
+                                tests, report_path, log, time.time()))
+            results = []
+            for process, tests, report_path, log, start in workers:
+                process.wait()
+                self.wall_times.append(time.time() - start)
+                if os.path.exists(report_path):
+                    with open(report_path) as f:
+                        result = json.load(f)
+                    results.append((tests, result['reports'], result['state']))
+                else:
+                    # the tests of a worker that stopped early are reported as failed, and nothing it
+                    # recorded is kept, so an incremental run does not take them for passes
+                    results.append((tests, [], {}))
+                    log.seek(0)
+                    sys.stderr.write(log.read())
+                log.close()
+            return results
+        finally:
+            shutil.rmtree(directory)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.wall_times:
+            terminalreporter.write_line('%s workers finished in %s seconds.' % (
+                len(self.wall_times), ', '.join('%.1f' % wall_time for wall_time in self.wall_times)))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import pytest
+from unittestzero import Assert
+
+from pages.breakpoints import BreakpointSweep, boundaries, breakpoint_widths, media_queries
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestBreakpoints:
+
+    def test_that_media_queries_are_read_from_css(self):
+        css = ('/* @media (min-width: 1px) { } */\n'
+               '@media screen and (min-width: 600px) { .a { color: red; } }\n'
+               '@media print { .b { display: none; } }\n'
+               '@media (max-width:40em) and (min-width: 20.5em) { .c { float: none; } }')
+        Assert.equal(media_queries(css), ['screen and (min-width: 600px)', 'print',
+                                          '(max-width:40em) and (min-width: 20.5em)'])
+
+    def test_that_boundaries_are_the_first_width_of_each_range(self):
+        Assert.equal(boundaries(['(min-width: 600px)', '(max-width: 599px)', '(MAX-WIDTH: 40em)',
+                                 '(min-width: 20.5em)', 'print']), [328, 600, 641])
+
+    def test_that_the_narrowest_width_of_each_range_is_swept(self):
+        Assert.equal(breakpoint_widths(['(min-width: 600px)', '(max-width: 1023px)', '(min-width: 2000px)',
+                                        '(max-width: 200px)']), [320, 600, 1024])
+        Assert.equal(breakpoint_widths([]), [320])
+
+    def test_that_a_sweep_reports_what_changes(self):
+        sweep = BreakpointSweep(['menu', 'sidebar'])
+        sweep.add(320, [True, False])
+        sweep.add(600, [True, True])
+        sweep.add(1024, [False, True])
+        Assert.equal(sweep.widths, [320, 600, 1024])
+        Assert.false(sweep.is_visible(320, 'sidebar'))
+        Assert.equal(sweep.report_lines(), ['At 600px the page shows sidebar.', 'At 1024px the page hides menu.'])
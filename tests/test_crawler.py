@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+
+import pytest
+import requests
+from unittestzero import Assert
+
+from crawler import Crawler
+
+
+class FakeResponse(object):
+
+    def __init__(self, url, html):
+        self.url = url
+        self.status_code = 200
+        self.headers = {'content-type': 'text/html; charset=utf-8'}
+        self.encoding = 'utf-8'
+        self.html = html
+
+    def iter_content(self, size):
+        data = self.html.encode('utf-8')
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+
+    def close(self):
+        pass
+
+
+class FakeSite(object):
+    """Stands in for a LinkChecker: pages are crawled from a dict of html, and other urls answer with a code."""
+
+    def __init__(self, pages, codes=None):
+        self.pages = pages
+        self.codes = codes or {}
+        self.streamed = []
+
+    def stream(self, url):
+        self.streamed.append(url)
+        if url not in self.pages:
+            response = FakeResponse(url, '')
+            response.status_code = 404
+            return response
+        return FakeResponse(url, self.pages[url])
+
+    def response_code(self, url):
+        code = self.codes.get(url, 200)
+        if isinstance(code, Exception):
+            raise code
+        return code
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestCrawler:
+
+    def test_that_only_followable_links_are_extracted(self):
+        html = ('<a href="/a#top">a</a><a href="#local">local</a><a href="mailto:a@example.com">mail</a>'
+                '<a href="javascript:void(0)">js</a><img src="b.png"><link rel="stylesheet" href="c.css">'
+                '<script src="http://other.example.com/d.js"></script><a href="tel:123">tel</a>')
+        crawler = Crawler('http://example.com/', FakeSite({}))
+        links = crawler._extract_links(FakeResponse('http://example.com/dir/', html))
+        Assert.equal(links, ['http://example.com/a', 'http://example.com/dir/b.png',
+                             'http://example.com/dir/c.css', 'http://other.example.com/d.js'])
+
+    def test_that_only_same_origin_pages_within_the_depth_are_crawled(self):
+        site = FakeSite({
+            'http://example.com/': '<a href="/one">one</a><a href="http://other.example.com/">other</a>',
+            'http://example.com/one': '<a href="/two">two</a>',
+            'http://example.com/two': '<a href="/three">three</a>',
+        })
+        Crawler('http://example.com', site, max_depth=1, workers=2).crawl()
+        Assert.equal(sorted(site.streamed), ['http://example.com/', 'http://example.com/one'])
+
+    def test_that_broken_links_are_reported_with_the_page_linking_to_them(self):
+        site = FakeSite({'http://example.com/': '<a href="/missing">x</a><a href="ftp://example.com/f">f</a>'
+                                               '<a href="http://other.example.com/gone">y</a>'},
+                        {'http://other.example.com/gone': 410,
+                         'ftp://example.com/f': requests.exceptions.InvalidSchema('no adapter')})
+        broken = Crawler('http://example.com/', site).crawl()
+        Assert.equal(sorted(broken), [
+            'ftp://example.com/f is not a valid url - status code: request failed (InvalidSchema) '
+            '(linked from http://example.com/).',
+            'http://example.com/missing is not a valid url - status code: 404 (linked from http://example.com/).',
+            'http://other.example.com/gone is not a valid url - status code: 410 (linked from http://example.com/).',
+        ])
+
+    def test_that_an_interrupted_crawl_continues_from_its_checkpoint(self, tmpdir):
+        checkpoint = tmpdir.join('crawl.json')
+        checkpoint.write(json.dumps({
+            'start_url': 'http://example.com/',
+            'max_depth': 2,
+            'seen': ['http://example.com/', 'http://example.com/left'],
+            'frontier': [['http://example.com/left', 1, 'http://example.com/']],
+            'broken': ['an earlier broken link'],
+            'checked': 1,
+        }))
+        site = FakeSite({'http://example.com/left': '<a href="/">home</a>'})
+        crawler = Crawler('http://example.com/', site, checkpoint_path=str(checkpoint))
+        Assert.equal(crawler.crawl(), ['an earlier broken link'])
+        Assert.equal(site.streamed, ['http://example.com/left'])
+        Assert.equal(crawler.checked, 2)
+        Assert.false(checkpoint.check())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import struct
+
+import pytest
+from unittestzero import Assert
+
+from pages.images import ImageHeader, declared_size, fetch_headers, image_header, problems
+
+
+def jpeg(width, height, metadata=b''):
+    """Return the start of a JPEG file with an APP1 segment of the metadata before its start of frame."""
+    app1 = b'\xff\xe1' + struct.pack('>H', len(metadata) + 2) + metadata
+    frame = b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    return b'\xff\xd8' + app1 + frame
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestImages:
+
+    def test_that_gif_and_png_dimensions_are_read(self):
+        Assert.equal(image_header(b'GIF89a' + struct.pack('<HH', 120, 40)), ImageHeader('gif', 120, 40))
+        png = b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', 640, 480)
+        Assert.equal(image_header(png), ImageHeader('png', 640, 480))
+
+    def test_that_jpeg_dimensions_are_read_after_its_metadata(self):
+        Assert.equal(image_header(jpeg(300, 200, b'Exif\x00\x00' + b'x' * 1000)), ImageHeader('jpeg', 300, 200))
+
+    def test_that_jpeg_metadata_past_the_data_read_is_recognised(self):
+        data = jpeg(300, 200, b'x' * 10000)[:8192]
+        Assert.equal(image_header(data), ImageHeader('jpeg', None, None))
+        Assert.equal(problems(image_header(data), 50000, 300, 200),
+                     ['its JPEG metadata is too large: the dimensions are not in its first 128 KB'])
+
+    def test_that_webp_dimensions_are_read(self):
+        lossy = b'RIFF\x00\x00\x00\x00WEBPVP8 ' + b'\x00' * 10 + struct.pack('<HH', 400, 300)
+        Assert.equal(image_header(lossy), ImageHeader('webp', 400, 300))
+        bits = (400 - 1) | ((300 - 1) << 14)
+        lossless = b'RIFF\x00\x00\x00\x00WEBPVP8L' + b'\x00' * 5 + struct.pack('<I', bits)
+        Assert.equal(image_header(lossless), ImageHeader('webp', 400, 300))
+        extended = (b'RIFF\x00\x00\x00\x00WEBPVP8X' + b'\x00' * 8 +
+                    struct.pack('<I', 399)[:3] + struct.pack('<I', 299)[:3])
+        Assert.equal(image_header(extended), ImageHeader('webp', 400, 300))
+
+    def test_that_other_formats_are_not_recognised(self):
+        Assert.equal(image_header(b'<svg xmlns="http://www.w3.org/2000/svg"></svg>'), None)
+        Assert.equal(problems(None, 1000, 10, 10), ['its format is not GIF, PNG, JPEG or WebP'])
+
+    def test_that_the_size_is_read_from_range_responses(self):
+        Assert.equal(declared_size(FakeResponse(206, {'content-range': 'bytes 0-8191/34567'})), 34567)
+        Assert.equal(declared_size(FakeResponse(200, {'content-length': '512'})), 512)
+        Assert.equal(declared_size(FakeResponse(206, {'content-range': 'bytes 0-8191/*'})), None)
+
+    def test_that_oversized_and_heavy_images_are_reported(self):
+        header = ImageHeader('gif', 1000, 800)
+        Assert.equal(problems(header, 300 * 1024, 100, 80), [
+            'it is 1000x800 pixels but shown at 100x80', 'it is 300 KB, over 200 KB'])
+        Assert.equal(problems(header, 900 * 1024, 1000, 800, max_bytes=1024 * 1024),
+                     ['its GIF uses 1.2 bytes per pixel'])
+        Assert.equal(problems(header, 100 * 1024, 500, 400, pixel_ratio=2), [])
+
+    def test_that_unreachable_images_are_reported_instead_of_raised(self):
+        headers = fetch_headers(['blob:http://example.com/1', 'ftp://example.com/a.png'], 5)
+        Assert.equal(headers, {'blob:http://example.com/1': (None, None), 'ftp://example.com/a.png': (None, None)})
+        Assert.equal(problems(None, None, 10, 10), ['it could not be fetched'])
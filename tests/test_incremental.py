@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import sys
+
+import pytest
+from unittestzero import Assert
+
+from incremental import IncrementalRun
+
+SAMPLE_TESTS = '''
+def test_title():
+    assert True
+
+
+def test_links(self=None):
+    self.find_bad_links(['http://example.com/'], 5)
+'''
+
+
+class FakeOption(object):
+    base_url = 'http://localhost/'
+
+
+class FakeConfig(object):
+    option = FakeOption()
+
+
+class FakeItem(object):
+
+    config = FakeConfig()
+
+    def __init__(self, module, name, keywords=('nondestructive',)):
+        self.nodeid = '%s.py::%s' % (module.__name__, name)
+        self.module = module
+        self.cls = None
+        self.obj = getattr(module, name)
+        self.keywords = dict((keyword, True) for keyword in keywords)
+
+
+class FakeReport(object):
+
+    failed = False
+    passed = True
+    skipped = False
+    when = 'call'
+
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+
+
+def sample_module(tmpdir):
+    """Import the sample tests from a file of their own, so that their source can be changed."""
+    path = tmpdir.join('incremental_sample_%s.py' % tmpdir.basename)
+    path.write(SAMPLE_TESTS)
+    sys.path.insert(0, str(tmpdir))
+    try:
+        return __import__(path.purebasename), path
+    finally:
+        sys.path.remove(str(tmpdir))
+
+
+def skipped(run, item):
+    try:
+        run.pytest_runtest_setup(item)
+    except pytest.skip.Exception:
+        return True
+    return False
+
+
+def passing_run(path, item):
+    """Run the test in an incremental run that passes it and saves its fingerprint."""
+    run = IncrementalRun(path)
+    Assert.false(skipped(run, item))
+    run.pytest_runtest_logreport(FakeReport(item.nodeid))
+    run.save()
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestIncremental:
+
+    def test_that_an_unchanged_test_is_a_cached_pass(self, tmpdir):
+        module, source = sample_module(tmpdir)
+        path = str(tmpdir.join('passed.json'))
+        passing_run(path, FakeItem(module, 'test_title'))
+        run = IncrementalRun(path)
+        item = FakeItem(module, 'test_title')
+        Assert.true(skipped(run, item))
+        report = FakeReport(item.nodeid)
+        report.skipped, report.passed = True, False
+        Assert.equal(run.pytest_report_teststatus(report), ('cached', 'c', 'CACHED'))
+        Assert.equal(run.cached, set([item.nodeid]))
+        Assert.false(skipped(IncrementalRun(path, full_run=True), item))
+
+    def test_that_a_changed_source_runs_again(self, tmpdir):
+        module, source = sample_module(tmpdir)
+        path = str(tmpdir.join('passed.json'))
+        passing_run(path, FakeItem(module, 'test_title'))
+        source.write(SAMPLE_TESTS + '\n# a change to the module\n')
+        Assert.false(skipped(IncrementalRun(path), FakeItem(module, 'test_title')))
+
+    def test_that_failures_forget_the_fingerprint(self, tmpdir):
+        module, source = sample_module(tmpdir)
+        path = str(tmpdir.join('passed.json'))
+        item = FakeItem(module, 'test_title')
+        passing_run(path, item)
+        run = IncrementalRun(path, full_run=True)
+        run.pytest_runtest_setup(item)
+        report = FakeReport(item.nodeid)
+        report.failed, report.passed = True, False
+        run.pytest_runtest_logreport(report)
+        Assert.equal(run.passed, {})
+
+    def test_that_tests_of_external_resources_always_run(self, tmpdir):
+        module, source = sample_module(tmpdir)
+        path = str(tmpdir.join('passed.json'))
+        run = IncrementalRun(path)
+        Assert.false(run.cacheable(FakeItem(module, 'test_links')))
+        Assert.false(run.cacheable(FakeItem(module, 'test_title', ('nondestructive', 'external'))))
+        Assert.false(run.cacheable(FakeItem(module, 'test_title', ())))
+        item = FakeItem(module, 'test_links')
+        run.pytest_runtest_setup(item)
+        run.pytest_runtest_logreport(FakeReport(item.nodeid))
+        Assert.equal(run.passed, {})
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+
+import pytest
+from unittestzero import Assert
+
+from pages import instrumentation
+from pages.instrumentation import CommandProfiler, percentile, summarize
+from pages.page import Page
+
+
+class FakeDriver(object):
+    """A driver that answers every command with nothing."""
+
+    session_id = 'profiled'
+
+    def execute(self, driver_command, params=None):
+        return {'value': None}
+
+
+class FakeSetup(object):
+
+    def __init__(self, selenium):
+        self.selenium = selenium
+        self.base_url = 'http://localhost/'
+        self.timeout = 1
+        self.default_implicit_wait = 0
+
+
+class ProfiledPage(Page):
+
+    def title_and_header(self):
+        self.selenium.execute('getTitle')
+        self.header()
+
+    def header(self):
+        self.selenium.execute('findElement', {'using': 'id', 'value': 'page-header'})
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestInstrumentation:
+
+    def test_that_percentiles_are_nearest_rank(self):
+        values = [0.001 * value for value in range(10, 0, -1)]
+        Assert.equal((percentile(values, 0.5), percentile(values, 0.95)), (0.005, 0.01))
+        Assert.equal(percentile([], 0.5), None)
+        Assert.equal(summarize([0.002, 0.001]),
+                     {'count': 2, 'total_ms': 3.0, 'p50_ms': 1.0, 'p95_ms': 2.0, 'max_ms': 2.0})
+
+    def test_that_commands_are_recorded_with_the_page_object_method_the_test_called(self):
+        profiler = CommandProfiler()
+        instrumentation.profiler = profiler
+        try:
+            driver = FakeDriver()
+            profiler.current_test = 'test_header'
+            ProfiledPage(FakeSetup(driver)).title_and_header()
+            driver.execute('getCurrentUrl')
+        finally:
+            instrumentation.profiler = None
+        Assert.equal([(record['test'], record['command'], record['locator'], record['method'])
+                      for record in profiler.records], [
+            ('test_header', 'getTitle', None, 'ProfiledPage.title_and_header'),
+            ('test_header', 'findElement', ['id', 'page-header'], 'ProfiledPage.title_and_header'),
+            ('test_header', 'getCurrentUrl', None, '(test)')])
+
+    def test_that_a_driver_is_instrumented_once(self):
+        profiler = CommandProfiler()
+        driver = profiler.instrument(profiler.instrument(FakeDriver()))
+        driver.execute('getTitle')
+        Assert.equal(len(profiler.records), 1)
+
+    def test_that_the_report_is_aggregated_per_test_method_and_command(self, tmpdir):
+        profiler = CommandProfiler()
+        for test, command, method, latency in [('a', 'findElement', 'Home.open', 0.002),
+                                               ('a', 'getTitle', 'Home.open', 0.001),
+                                               ('b', 'findElement', 'Home.hover', 0.010)]:
+            profiler.records.append({'test': test, 'command': command, 'locator': None,
+                                     'method': method, 'latency': latency})
+        path = str(tmpdir.join('profile.json'))
+        profiler.write_report(path)
+        with open(path) as f:
+            report = json.load(f)
+        Assert.equal(report['tests']['a']['methods']['Home.open']['count'], 2)
+        Assert.equal(report['commands']['findElement']['total_ms'], 12.0)
+        lines = profiler.summary_lines()
+        Assert.equal([line.split()[0] for line in lines[1:]], ['Home.hover', 'Home.open'])
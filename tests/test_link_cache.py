@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import time
+
+import pytest
+from unittestzero import Assert
+
+from link_cache import LinkCache
+from link_checker import LinkChecker
+
+
+class FakeResponse(object):
+
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class ScriptedLinkChecker(LinkChecker):
+    """A link checker that answers each request with the next of a list of codes, and records the headers sent."""
+
+    def __init__(self, codes, cache):
+        LinkChecker.__init__(self, 5, cache=cache)
+        self.codes = list(codes)
+        self.sent_headers = []
+
+    def _request(self, url, headers=None):
+        self.sent_headers.append(headers)
+        return self.codes.pop(0), None
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestLinkCache:
+
+    def test_that_entries_are_fresh_until_the_ttl_passes(self, tmpdir):
+        cache = LinkCache(str(tmpdir.join('links.json')), ttl=60)
+        cache.store('HTTP://Example.com/a#top', 200)
+        entry = cache.get('http://example.com/a')
+        Assert.true(cache.is_fresh(entry))
+        entry['checked'] = time.time() - 61
+        Assert.false(cache.is_fresh(entry))
+
+    def test_that_failures_and_recheck_all_are_never_fresh(self, tmpdir):
+        cache = LinkCache(str(tmpdir.join('links.json')))
+        cache.store('http://example.com/missing', 404)
+        Assert.false(cache.is_fresh(cache.get('http://example.com/missing')))
+        cache.recheck = 'all'
+        cache.store('http://example.com/', 200)
+        Assert.false(cache.is_fresh(cache.get('http://example.com/')))
+
+    def test_that_validators_come_from_the_stored_response(self, tmpdir):
+        cache = LinkCache(str(tmpdir.join('links.json')))
+        cache.store('http://example.com/', 200, FakeResponse({'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jul 2013 00:00:00 GMT'}))
+        Assert.equal(cache.validators(cache.get('http://example.com/')),
+                     {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jul 2013 00:00:00 GMT'})
+        cache.store('http://example.com/gone', 404, FakeResponse({'ETag': '"v1"'}))
+        Assert.equal(cache.validators(cache.get('http://example.com/gone')), {})
+
+    def test_that_the_oldest_entries_are_evicted(self, tmpdir):
+        cache = LinkCache(str(tmpdir.join('links.json')), max_entries=2)
+        for path in ('a', 'b', 'c'):
+            cache.store('http://example.com/%s' % path, 200)
+            time.sleep(0.01)
+        Assert.equal(len(cache), 2)
+        Assert.equal(cache.get('http://example.com/a'), None)
+
+    def test_that_the_cache_survives_a_save(self, tmpdir):
+        path = str(tmpdir.join('links.json'))
+        cache = LinkCache(path)
+        cache.store('http://example.com/', 200)
+        cache.save()
+        Assert.equal(LinkCache(path).get('http://example.com/')['status'], 200)
+        tmpdir.join('links.json').write('{"truncated')
+        Assert.equal(len(LinkCache(path)), 0)
+
+    def test_that_merging_keeps_the_latest_check(self, tmpdir):
+        cache = LinkCache(str(tmpdir.join('links.json')))
+        cache.store('http://example.com/', 200)
+        newer = {'status': 404, 'checked': time.time() + 10, 'etag': None, 'last_modified': None}
+        older = {'status': 500, 'checked': 0, 'etag': None, 'last_modified': None}
+        cache.merge({'http://example.com/': newer, 'http://example.com/other': older})
+        Assert.equal(cache.get('http://example.com/')['status'], 404)
+        cache.merge({'http://example.com/': older})
+        Assert.equal(cache.get('http://example.com/')['status'], 404)
+        Assert.equal(cache.get('http://example.com/other')['status'], 500)
+
+    def test_that_stale_entries_are_revalidated(self, tmpdir):
+        cache = LinkCache(str(tmpdir.join('links.json')), ttl=60)
+        cache.store('http://example.com/', 200, FakeResponse({'ETag': '"v1"'}))
+        checker = ScriptedLinkChecker([304], cache)
+        try:
+            Assert.equal(checker.response_code('http://example.com/'), 200)
+            Assert.equal(cache.hits, 1)
+            Assert.equal(checker.sent_headers, [])
+            cache.get('http://example.com/')['checked'] = time.time() - 61
+            Assert.equal(checker.response_code('http://example.com/'), 200)
+        finally:
+            checker.close()
+        Assert.equal(checker.sent_headers, [{'If-None-Match': '"v1"'}])
+        Assert.equal(cache.revalidated, 1)
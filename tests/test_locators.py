@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import os
+
+import pytest
+from unittestzero import Assert
+
+from pages.home import HomePage
+from pages.locators import Locator, LocatorIndex, page_locators
+
+SAMPLE_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample', 'index.html')
+
+HTML = '''
+<div id="menu" class="nav wide"><a href="/">Home</a><a href="/about">About us</a></div>
+<p class="nav">One</p><p name="intro">Two</p>
+'''
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestLocators:
+
+    def test_that_locators_are_counted_from_the_index(self):
+        index = LocatorIndex(HTML)
+        Assert.equal([index.count(locator) for locator in [
+            ('id', 'menu'), ('class name', 'nav'), ('tag name', 'A'), ('name', 'intro'),
+            ('css selector', 'p.nav'), ('css selector', '#menu > a'), ('link text', 'About us'),
+            ('partial link text', 'o'), ('xpath', '//p')]], [1, 2, 2, 1, 1, 2, 1, 2, None])
+
+    def test_that_every_locator_of_a_page_object_is_found(self):
+        locators = dict(((locator.owner, locator.name), locator) for locator in page_locators(HomePage))
+        Assert.equal(locators[('HomePage', '_drop_down_locator')].locator, ('id', 'dropdown'))
+        Assert.true(locators[('HomePage', '_list_items_locator')].multiple)
+        Assert.true(locators[('HomePage.ListItem', '_item_title_locator')].relative)
+        Assert.equal(locators[('HomePage', 'valid_link_list[2]')].locator[1], '#valid-links > li:nth-of-type(3) > a')
+        Assert.equal(locators[('HomePage.Footer', 'copyright_links_list[0]')].locator[1], 'footer > a:nth-of-type(1)')
+
+    def test_that_missing_home_page_locators_are_reported(self):
+        with open(SAMPLE_PAGE) as f:
+            index = LocatorIndex(f.read())
+        Assert.equal(index.problems(page_locators(HomePage)), [
+            "HomePage._hover_div_locator id='hover-elements' matches no element.",
+            "HomePage._hover_link_locator id='hover-link' matches no element."])
+
+    def test_that_locators_matching_several_elements_are_reported(self):
+        index = LocatorIndex(HTML)
+        nav = Locator('HomePage', '_nav_locator', ('class name', 'nav'), False, False)
+        Assert.equal(index.problems([nav, nav._replace(relative=True), nav._replace(multiple=True)]),
+                     ["HomePage._nav_locator class name='nav' matches 2 elements, but only the first is used."])
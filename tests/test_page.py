@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import itertools
+import os
+import time
+
+import pytest
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from unittestzero import Assert
+
+from benchmarks.standin import StandInDriver
+from pages.home import HomePage
+from pages.page import Page
+from pages import scripts
+from pages.static import PARSER
+
+SAMPLE_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample', 'index.html')
+
+
+class CountingDriver(StandInDriver):
+    """A stand-in driver for the sample page that keeps every command it is sent."""
+
+    _sessions = itertools.count()
+
+    def __init__(self):
+        StandInDriver.__init__(self)
+        # a session of its own, so no state is shared with the page objects of other tests
+        self.session_id = 'counting-%s' % next(self._sessions)
+        self.commands = []
+        self._command_get('http://localhost/')
+
+    def execute(self, driver_command, params=None):
+        self.commands.append((driver_command, params))
+        return StandInDriver.execute(self, driver_command, params)
+
+    def _command_get(self, url):
+        self.url = url
+        with open(SAMPLE_PAGE) as f:
+            self.soup = BeautifulSoup(f.read(), PARSER)
+        self._elements = {}
+        self._id_index = None
+
+    def sent(self, driver_command):
+        return [params for command, params in self.commands if command == driver_command]
+
+
+class NoAsyncDriver(CountingDriver):
+    """A stand-in driver for a browser that cannot run asynchronous scripts."""
+
+    def _command_executeAsyncScript(self, script, args):
+        raise WebDriverException('executeAsyncScript is not supported')
+
+
+class FakeSetup(object):
+
+    def __init__(self, selenium, default_implicit_wait=10):
+        self.selenium = selenium
+        self.base_url = 'http://localhost/'
+        self.timeout = 1
+        self.default_implicit_wait = default_implicit_wait
+
+
+class StaleElement(object):
+    """An element handle whose element has been removed from the page."""
+
+    def is_displayed(self):
+        raise StaleElementReferenceException('Element is no longer attached to the DOM')
+
+
+class SamplePage(Page):
+
+    _page_title = u'Casszilla!'
+    _drop_down_locator = (By.ID, 'dropdown')
+    _selected_option_locator = (By.CSS_SELECTOR, '#dropdown > option[selected]')
+    _input_field_locator = (By.ID, 'input-field')
+    _click_link_locator = (By.ID, 'click')
+    _missing_locator = (By.ID, 'missing')
+
+
+class CachingPage(SamplePage):
+
+    _cache_elements = True
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestPage:
+
+    def test_that_back_to_back_checks_turn_the_implicit_wait_off_once(self):
+        driver = CountingDriver()
+        page = SamplePage(FakeSetup(driver))
+        saved = Page.saved_driver_commands
+        for locator in [page._drop_down_locator, page._missing_locator] * 2 + [page._drop_down_locator]:
+            page.is_element_present(locator)
+        Assert.equal(driver.sent('implicitlyWait'), [{'ms': 0}])
+        Assert.equal(Page.saved_driver_commands - saved, 9)
+
+    def test_that_the_implicit_wait_is_restored_before_the_next_lookup(self):
+        driver = CountingDriver()
+        page = SamplePage(FakeSetup(driver))
+        page.is_element_present(page._missing_locator)
+        # a lookup made on the driver directly waits again, too
+        driver.find_element(*page._drop_down_locator)
+        Assert.equal([command for command, params in driver.commands[-3:]],
+                     ['findElement', 'implicitlyWait', 'findElement'])
+        Assert.equal(driver.sent('implicitlyWait'), [{'ms': 0}, {'ms': 10000}])
+        page.find_element(page._drop_down_locator)
+        Assert.equal(len(driver.sent('implicitlyWait')), 2)
+
+    def test_that_cached_elements_are_looked_up_once(self):
+        driver = CountingDriver()
+        page = CachingPage(FakeSetup(driver))
+        Assert.true(page.find_element(page._drop_down_locator) is page.find_element(page._drop_down_locator))
+        Assert.equal((page.element_cache_hits, page.element_cache_misses), (1, 1))
+        Assert.equal(len(driver.sent('findElement')), 1)
+
+    def test_that_typing_shares_the_lookup_of_clearing(self):
+        driver = CountingDriver()
+        page = CachingPage(FakeSetup(driver))
+        Assert.true(page.input_text('Just some text.', page._input_field_locator))
+        Assert.equal((page.element_cache_hits, page.element_cache_misses), (1, 1))
+        Assert.equal(len(driver.sent('findElement')), 1)
+        Assert.equal(driver.find_element(*page._input_field_locator).tag['value'], 'Just some text.')
+
+    def test_that_the_least_recently_used_element_is_dropped(self):
+        page = CachingPage(FakeSetup(CountingDriver()))
+        page._element_cache_size = 2
+        for locator in [page._drop_down_locator, page._input_field_locator, page._drop_down_locator,
+                        page._click_link_locator]:
+            page.find_element(locator)
+        page.find_element(page._drop_down_locator)
+        page.find_element(page._input_field_locator)
+        Assert.equal((page.element_cache_hits, page.element_cache_misses), (2, 4))
+
+    def test_that_the_cache_is_cleared_when_the_page_changes(self):
+        page = CachingPage(FakeSetup(CountingDriver()))
+        for change in [lambda: page.open('', reload=True), lambda: page.click_element(page._click_link_locator),
+                       lambda: page.input_text('text', page._input_field_locator),
+                       lambda: page.execute_script('return 1;')]:
+            page.find_element(page._drop_down_locator)
+            change()
+            Assert.equal(len(page._element_cache), 0)
+
+    def test_that_a_stale_cached_element_is_found_again(self):
+        driver = CountingDriver()
+        page = CachingPage(FakeSetup(driver))
+        page._cache_element(page._drop_down_locator, StaleElement())
+        Assert.true(page.is_element_visible(page._drop_down_locator))
+        Assert.equal((page.element_cache_hits, page.element_cache_misses), (1, 1))
+        Assert.equal(len(driver.sent('findElement')), 1)
+
+    def test_that_reading_snapshots_does_not_reload_the_page(self):
+        driver = CountingDriver()
+        page = HomePage(FakeSetup(driver))
+        page.go_to_page()
+        Assert.equal([item.title for item in page.list_item_snapshots][:2], ['First Item', 'Second Item'])
+        page.go_to_page()
+        Assert.equal(len(driver.sent('get')), 1)
+
+    def test_that_waits_time_out_on_the_wall_clock(self):
+        page = SamplePage(FakeSetup(CountingDriver()))
+        page.timeout = 0.2
+        start = time.time()
+        with pytest.raises(TimeoutException) as error:
+            page.wait_until(lambda: False, 'never true')
+        Assert.true(0.2 <= time.time() - start < 0.5)
+        Assert.equal(error.value.msg, 'never true')
+
+    def test_that_waits_run_in_the_browser_with_the_script_timeout_set_once(self):
+        driver = CountingDriver()
+        page = SamplePage(FakeSetup(driver))
+        page.wait_for_element_present(page._drop_down_locator)
+        page.wait_for_element_visible(page._drop_down_locator)
+        with pytest.raises(TimeoutException) as error:
+            page.wait_for_element_visible(page._missing_locator)
+        Assert.equal(error.value.msg, "('id', 'missing') is not visible")
+        Assert.equal(len(driver.sent('executeAsyncScript')), 3)
+        Assert.equal(driver.sent('setScriptTimeout'), [{'ms': 6000}])
+
+    def test_that_waits_poll_on_browsers_without_asynchronous_scripts(self):
+        driver = NoAsyncDriver()
+        page = SamplePage(FakeSetup(driver))
+        page.timeout = 0.2
+        page.wait_for_element_visible(page._drop_down_locator)
+        with pytest.raises(TimeoutException) as error:
+            page.wait_for_element_present(page._missing_locator)
+        Assert.equal(error.value.msg, "('id', 'missing') has not loaded")
+        # the next page object of the session does not try the script again
+        SamplePage(FakeSetup(driver)).wait_for_element_not_visible(page._missing_locator)
+        Assert.equal(len(driver.sent('executeAsyncScript')), 1)
+
+    def test_that_options_are_selected_by_value_text_and_index_in_one_call(self):
+        driver = CountingDriver()
+        page = SamplePage(FakeSetup(driver))
+        for select, option in [(page.select_option, 'dropdown option 2'),
+                               (page.select_option_by_text, 'dropdown option 3'),
+                               (page.select_option_by_index, 4)]:
+            commands = len(driver.commands)
+            select(option, page._drop_down_locator)
+            Assert.equal([command for command, params in driver.commands[commands:]], ['executeScript'])
+        Assert.equal(page.find_element(page._selected_option_locator).text, 'dropdown option 4')
+
+    def test_that_missing_options_and_dropdowns_are_reported(self):
+        page = SamplePage(FakeSetup(CountingDriver()))
+        Assert.false(page._read_script(scripts.SELECT_OPTION, None, 'id', 'dropdown', 'value', 'missing'))
+        with pytest.raises(Exception) as error:
+            page.select_option('missing', page._drop_down_locator)
+        Assert.equal(str(error.value), "Could not select option 'missing' because it was not found.")
+        Assert.equal(page._read_script(scripts.SELECT_OPTION, None, 'id', 'missing', 'value', 'default'), None)
+        with pytest.raises(NoSuchElementException):
+            page.select_option('default', page._missing_locator)
+
+    def test_that_all_options_are_read_in_one_call(self):
+        driver = CountingDriver()
+        options = SamplePage(FakeSetup(driver)).dropdown_options(SamplePage._drop_down_locator)
+        Assert.equal(options[:2], [('default', 'Default'), ('dropdown option 1', 'dropdown option 1')])
+        Assert.equal(len(options), 6)
+        Assert.equal([command for command, params in driver.commands], ['executeScript'])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import pytest
+from unittestzero import Assert
+
+from pages.replay import Recorder, ReplayDriver, ReplayExecutor, ReplayMismatchError, recording_path
+
+
+class FakeExecutor(object):
+    """A command executor that answers every command with its name."""
+
+    def execute(self, command, params):
+        return {'status': 0, 'value': command}
+
+
+class FakeDriver(object):
+
+    def __init__(self):
+        self.command_executor = FakeExecutor()
+
+
+def record(tmpdir, commands):
+    """Record the commands, as (command, params) pairs, and return the path of the recording."""
+    driver = Recorder().instrument(FakeDriver())
+    recorder = driver.command_executor._driver_recorder
+    for command, params in commands:
+        driver.command_executor.execute(command, params)
+    path = recording_path(str(tmpdir), 'tests/test_home_page.py::TestHomePage::test_a')
+    recorder.save(path, 'test_a', 10)
+    return path
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestReplay:
+
+    def test_that_recordings_are_named_after_the_test(self, tmpdir):
+        Assert.equal(recording_path('recordings', 'tests/test_a.py::Test::test_b[1]'),
+                     'recordings/tests_test_a.py_Test_test_b_1_.json.gz')
+
+    def test_that_session_commands_are_not_recorded(self, tmpdir):
+        path = record(tmpdir, [('newSession', {}), ('get', {'url': 'http://example.com/', 'sessionId': 's1'}),
+                               ('quit', {'sessionId': 's1'})])
+        executor = ReplayExecutor(path)
+        Assert.equal(executor.commands, [['get', {'url': 'http://example.com/'}, {'status': 0, 'value': 'get'}]])
+        Assert.equal(executor.implicit_wait, 10)
+
+    def test_that_commands_replay_in_order(self, tmpdir):
+        path = record(tmpdir, [('get', {'url': 'http://example.com/'}), ('getTitle', {})])
+        executor = ReplayExecutor(path)
+        Assert.equal(executor.execute('get', {'url': 'http://example.com/', 'sessionId': 'other'})['value'], 'get')
+        Assert.equal(executor.unplayed(), 1)
+        Assert.equal(executor.execute('getTitle', {})['value'], 'getTitle')
+        Assert.equal(executor.unplayed(), 0)
+
+    def test_that_a_different_command_is_a_mismatch(self, tmpdir):
+        path = record(tmpdir, [('executeScript', {'script': 'return 1; ' * 20, 'args': []})])
+        executor = ReplayExecutor(path)
+        with pytest.raises(ReplayMismatchError) as error:
+            executor.execute('executeScript', {'script': 'return 2;', 'args': []})
+        message = error.value.msg
+        Assert.contains('Command 1 of test_a was executeScript', message)
+        # long scripts are cut short, so the message stays readable
+        Assert.contains('return 1; return 1; return 1; return 1; return 1; return ...', message)
+        Assert.true(len(message) < 400, message)
+
+    def test_that_commands_past_the_end_are_a_mismatch(self, tmpdir):
+        executor = ReplayExecutor(record(tmpdir, []))
+        with pytest.raises(ReplayMismatchError) as error:
+            executor.execute('getTitle', {})
+        Assert.contains('ends after 0 commands', error.value.msg)
+
+    def test_that_a_replay_driver_needs_no_browser(self, tmpdir):
+        driver = ReplayDriver(record(tmpdir, [('getTitle', {})]))
+        Assert.equal(driver.title, 'getTitle')
+        Assert.true(driver.session_id.startswith('replay-'))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import pytest
+from unittestzero import Assert
+
+from incremental import IncrementalRun
+from sharding import DurationHistory, ShardController, shard
+
+
+class FakeConfig(object):
+
+    def __init__(self, incremental_run):
+        self._incremental_run = incremental_run
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestSharding:
+
+    def test_that_shards_take_about_as_long_as_each_other(self):
+        durations = [('a', 1.0), ('b', 8.0), ('c', 3.0), ('d', 4.0), ('e', 2.0), ('f', 2.0)]
+        shards = shard(durations, 2)
+        totals = [sum(dict(durations)[test] for test in tests) for tests in shards]
+        Assert.equal(sorted(totals), [10.0, 10.0])
+        Assert.equal(sorted(test for tests in shards for test in tests), ['a', 'b', 'c', 'd', 'e', 'f'])
+
+    def test_that_shards_keep_the_original_order(self):
+        shards = shard([('z', 1.0), ('y', 1.0), ('x', 1.0), ('w', 1.0)], 2)
+        for tests in shards:
+            Assert.equal(tests, sorted(tests, reverse=True))
+
+    def test_that_extra_workers_get_empty_shards(self):
+        Assert.equal(shard([('a', 1.0)], 3), [['a'], [], []])
+
+    def test_that_unknown_durations_are_estimated_from_the_median(self, tmpdir):
+        history = DurationHistory(str(tmpdir.join('durations.json')))
+        Assert.equal(history.estimate(['a']), [('a', 1.0)])
+        history.update({'a': 1.0, 'b': 5.0, 'c': 9.0})
+        Assert.equal(history.estimate(['b', 'new']), [('b', 5.0), ('new', 5.0)])
+
+    def test_that_durations_are_smoothed_and_saved(self, tmpdir):
+        path = str(tmpdir.join('durations.json'))
+        history = DurationHistory(path)
+        history.update({'a': 2.0})
+        history.update({'a': 4.0})
+        history.save()
+        Assert.equal(DurationHistory(path).durations, {'a': 3.0})
+
+    def test_that_workers_are_not_started_recursively(self, tmpdir):
+        controller = ShardController(2, str(tmpdir.join('durations.json')), args=[
+            '--shards', '4', '--driver=firefox', '--shard-durations=d.json', '--shards=2',
+            '--shard-durations', 'd.json', 'tests'])
+        Assert.equal(controller.worker_args(), ['--driver=firefox', 'tests', '--reuse-sessions'])
+
+    def test_that_recording_workers_do_not_reuse_sessions(self, tmpdir):
+        durations = str(tmpdir.join('durations.json'))
+        for args in (['--record-driver', 'recordings', 'tests'], ['--record-driver=recordings', 'tests']):
+            Assert.equal(ShardController(2, durations, args=['--shards=2'] + args).worker_args(), args)
+        Assert.equal(ShardController(2, durations, args=['--reuse-sessions']).worker_args(), ['--reuse-sessions'])
+
+    def test_that_worker_passes_are_merged_into_the_incremental_run(self, tmpdir):
+        incremental_run = IncrementalRun(str(tmpdir.join('passed.json')))
+        incremental_run.passed = {'a': 'old', 'b': 'old', 'other': 'kept'}
+        controller = ShardController(2, str(tmpdir.join('durations.json')), args=[])
+        controller.merge(FakeConfig(incremental_run), ['a', 'b', 'c'],
+                         {'passed': {'a': 'new', 'b': None, 'c': 'new'}, 'cached': ['a']})
+        Assert.equal(incremental_run.passed, {'a': 'new', 'c': 'new', 'other': 'kept'})
+        Assert.equal(incremental_run.cached, set(['a']))
+        # a worker that stopped before reporting leaves none of its tests passed
+        controller.merge(FakeConfig(incremental_run), ['a', 'c'], {})
+        Assert.equal(incremental_run.passed, {'other': 'kept'})
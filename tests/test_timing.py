@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import json
+
+import pytest
+from unittestzero import Assert
+
+from pages.page import Page
+from pages.timing import TimingRecorder, page_load
+
+
+def timing_result(load_ms, total_bytes=1000):
+    """Return a READ_PAGE_TIMING result of a page that loaded in load_ms with one image of total_bytes."""
+    return [[50.0, load_ms / 2.0, load_ms, 200],
+            [['first-paint', 30.04], ['first-contentful-paint', 40.0]],
+            [['http://localhost/a.png', 'img', 0, total_bytes - 200, 12.34]]]
+
+
+class LoadingDriver(object):
+    """A driver whose page is still loading for the first few timing reads."""
+
+    session_id = 'loading'
+
+    def __init__(self, loading_reads):
+        self.loading_reads = loading_reads
+        self.reads = 0
+
+    def execute(self, driver_command, params=None):
+        return {'value': None}
+
+    def execute_script(self, script, *args):
+        self.reads += 1
+        return self.reads <= self.loading_reads and 'loading' or timing_result(100.0)
+
+
+class FakeSetup(object):
+
+    def __init__(self, selenium):
+        self.selenium = selenium
+        self.base_url = 'http://localhost/'
+        self.timeout = 1
+        self.default_implicit_wait = 0
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestTiming:
+
+    def test_that_page_loads_are_read_from_the_timing_script(self):
+        load = page_load(timing_result(100.0))
+        Assert.equal((load['ttfb_ms'], load['dom_content_loaded_ms'], load['load_ms']), (50.0, 50.0, 100.0))
+        Assert.equal((load['first_paint_ms'], load['first_contentful_paint_ms']), (30.0, 40.0))
+        # a cached resource transferred nothing, but its body still counts
+        Assert.equal(load['total_bytes'], 1000)
+        Assert.equal(load['resources'], [{'url': 'http://localhost/a.png', 'type': 'img', 'bytes': 800,
+                                          'duration_ms': 12.3}])
+
+    def test_that_unfinished_and_missing_timing_is_not_a_load(self):
+        Assert.equal(page_load(None), None)
+        Assert.equal(page_load('loading'), None)
+
+    def test_that_timing_is_read_again_until_the_load_event_ends(self):
+        driver = LoadingDriver(2)
+        Assert.equal(Page(FakeSetup(driver)).page_timing()['load_ms'], 100.0)
+        Assert.equal(driver.reads, 3)
+        page = Page(FakeSetup(LoadingDriver(1000)))
+        page.timeout = 0.1
+        Assert.equal(page.page_timing(), None)
+
+    def test_that_loads_over_budget_are_reported(self):
+        recorder = TimingRecorder(load_budget_ms=150, bytes_budget=5000)
+        for load_ms in [100.0, 120.0, 200.0]:
+            recorder.record('http://localhost/', page_load(timing_result(load_ms)))
+        Assert.equal(recorder.over_budget('http://localhost/'),
+                     ['http://localhost/ took 200.0 ms to load at p95, over the budget of 150 ms.'])
+        recorder.record('http://localhost/', page_load(timing_result(100.0, total_bytes=9000)))
+        recorder.record('http://localhost/', page_load(timing_result(100.0, total_bytes=9000)))
+        Assert.contains('transferred 9000 bytes at p95, over the budget of 5000 bytes. '
+                        'The heaviest resource is http://localhost/a.png (8800 bytes).',
+                        recorder.over_budget('http://localhost/')[1])
+
+    def test_that_the_history_keeps_the_last_loads(self, tmpdir):
+        path = str(tmpdir.join('history.json'))
+        for run in range(3):
+            recorder = TimingRecorder(path, max_history=2)
+            recorder.current_test = 'test_%s' % run
+            recorder.record('http://localhost/', page_load(timing_result(100.0 + run)))
+            recorder.save()
+        with open(path) as f:
+            history = json.load(f)['http://localhost/']
+        Assert.equal([(load['test'], load['load_ms']) for load in history], [('test_1', 101.0), ('test_2', 102.0)])
+        Assert.equal(history[-1]['heaviest'], [['http://localhost/a.png', 800]])
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import io
+import os
+
+import pytest
+from unittestzero import Assert
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from pages import visual
+
+
+def page_image(height=100, width=70):
+    """Return a white image with a block of noise in it, standing in for a screenshot."""
+    pixels = numpy.full((height, width, 3), 255, numpy.uint8)
+    pixels[10:40, 5:60] = numpy.random.RandomState(1).randint(0, 256, (30, 55, 3))
+    return pixels
+
+
+def files(directory):
+    return sum(len(names) for path, dirs, names in os.walk(directory))
+
+
+@pytest.mark.skip_selenium
+@pytest.mark.nondestructive
+class TestVisual:
+
+    def test_that_screenshots_decode_to_rgb_pixels(self):
+        output = io.BytesIO()
+        Image.fromarray(page_image()).convert('RGBA').save(output, 'PNG')
+        pixels = visual.decode(output.getvalue())
+        Assert.equal(pixels.shape, (100, 70, 3))
+        Assert.true((pixels == page_image()).all())
+
+    def test_that_images_are_cut_into_padded_tiles(self):
+        tile_array = visual.tiles(page_image(), size=32)
+        Assert.equal(tile_array.shape, (4, 3, 32 * 32 * 3))
+        # the last column of tiles is padded with black past the image's 70 pixels
+        last = tile_array[0, 2].reshape(32, 32, 3)
+        Assert.true((last[:, :6] == 255).all())
+        Assert.true((last[:, 6:] == 0).all())
+
+    def test_that_only_changed_tiles_hash_differently(self):
+        pixels = page_image()
+        changed = pixels.copy()
+        changed[70, 40] = (254, 255, 255)
+        before = visual.tile_hashes(visual.tiles(pixels))
+        after = visual.tile_hashes(visual.tiles(changed))
+        Assert.equal([tuple(index) for index in numpy.argwhere((before != after).any(axis=-1))], [(2, 1)])
+
+    def test_that_a_new_snapshot_becomes_the_baseline(self, tmpdir):
+        store = visual.BaselineStore(str(tmpdir))
+        Assert.true(store.compare('home@500px', page_image()).new)
+        diff = store.compare('home@500px', page_image())
+        Assert.false(diff.new)
+        Assert.equal((diff.changed_tiles, diff.total_tiles, diff.boxes, diff.diff_path), (0, 12, [], None))
+
+    def test_that_changes_within_the_tolerance_are_ignored(self, tmpdir):
+        store = visual.BaselineStore(str(tmpdir), tolerance=16)
+        store.compare('home@500px', page_image())
+        changed = page_image()
+        changed[50:60, 10:20] = 245
+        Assert.equal(store.compare('home@500px', changed).boxes, [])
+
+    def test_that_changed_regions_are_boxed_and_drawn(self, tmpdir):
+        store = visual.BaselineStore(str(tmpdir))
+        store.compare('home@500px', page_image())
+        changed = page_image()
+        changed[40:50, 5:15] = 0
+        changed[95, 65] = 0
+        diff = store.compare('home@500px', changed)
+        Assert.equal(sorted(diff.boxes), [(5, 40, 15, 50), (65, 95, 66, 96)])
+        Assert.equal((diff.changed_tiles, diff.changed_pixels), (2, 101))
+        Assert.true(os.path.exists(diff.diff_path))
+        drawn = numpy.asarray(Image.open(diff.diff_path).convert('RGB'))
+        Assert.equal(tuple(drawn[45, 10]), (255, 0, 0))
+
+    def test_that_a_different_size_changes_everything(self, tmpdir):
+        store = visual.BaselineStore(str(tmpdir))
+        store.compare('home@500px', page_image())
+        diff = store.compare('home@500px', page_image(height=80))
+        Assert.equal(diff.boxes, [(0, 0, 70, 80)])
+
+    def test_that_identical_tiles_are_stored_once(self, tmpdir):
+        store = visual.BaselineStore(str(tmpdir))
+        store.compare('home@500px', page_image())
+        tiles_stored = files(str(tmpdir.join('tiles')))
+        store.compare('home@600px', page_image())
+        Assert.equal(files(str(tmpdir.join('tiles'))), tiles_stored)
+        Assert.true(tiles_stored < 12)
+
+    def test_that_updating_replaces_the_baseline(self, tmpdir):
+        visual.BaselineStore(str(tmpdir)).compare('home@500px', page_image())
+        changed = page_image()
+        changed[0:5, 0:5] = 0
+        Assert.true(visual.BaselineStore(str(tmpdir), update=True).compare('home@500px', changed).new)
+        Assert.equal(visual.BaselineStore(str(tmpdir)).compare('home@500px', changed).boxes, [])